@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""Load a web_flask application served by the threaded Flask server
+and by an ASGI server through web_flask/asgi.py, and print the requests
+per second and the latency percentiles at each level of concurrency
+
+The storage is the one the HBNB_* variables select; the page cache is
+off so every request reads it. A few states with cities are created
+first when it holds none. The ASGI server is uvicorn with a2wsgi, which
+are not dependencies of the project: pip install uvicorn a2wsgi to run
+this.
+
+Usage: ./benchmarks/bench_async.py [app] [path] [seconds]
+e.g. ./benchmarks/bench_async.py 8-cities_by_states /cities_by_states 5
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SERVE = {
+    "wsgi": "from werkzeug.serving import run_simple\n"
+            "from importlib import import_module\n"
+            "app = import_module('web_flask.' + {name!r}).app\n"
+            "run_simple('127.0.0.1', {port}, app, threaded=True)\n",
+    "asgi": "import os, uvicorn\n"
+            "os.environ['HBNB_WEB_APP'] = {name!r}\n"
+            "uvicorn.run('web_flask.asgi:app', port={port},"
+            " log_level='warning')\n",
+}
+
+
+def seed(count=50):
+    """Create count states with three cities each if there is none"""
+    from models import storage
+    from models.city import City
+    from models.state import State
+    if storage.all(State):
+        return
+    for i in range(count):
+        state = State(name="State {}".format(i))
+        storage.new(state)
+        for j in range(3):
+            storage.new(City(name="City {}".format(j), state_id=state.id))
+    storage.save()
+    storage.close()
+
+
+def serve(server, name):
+    """Start a server of the application in a new process and return
+    the process and its port once it accepts connections"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, PYTHONPATH=ROOT, HBNB_PAGE_CACHE_SIZE="0")
+    process = subprocess.Popen(
+        [sys.executable, "-c", SERVE[server].format(name=name, port=port)],
+        env=env, stderr=subprocess.DEVNULL)
+    for i in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("{} server did not start".format(server))
+
+
+async def client(port, path, deadline, latencies):
+    """Send requests on a kept alive connection until the deadline,
+    appending their latencies"""
+    request = ("GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n"
+               .format(path).encode())
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        if writer is None:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        start = time.perf_counter()
+        writer.write(request)
+        head = (await reader.readuntil(b"\r\n\r\n")).decode().lower()
+        assert head.startswith("http/1.1 200"), head.split("\r\n")[0]
+        length = int(head.split("content-length:")[1].split("\r\n")[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        if "connection: close" in head:
+            writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, path, clients, seconds):
+    """Return the requests per second and the latencies of clients
+    connections sending requests for seconds"""
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(port, path, deadline, latencies)
+                           for i in range(clients)))
+    return len(latencies) / seconds, sorted(latencies)
+
+
+def main(name, path, seconds):
+    """Print the throughput and latencies of 1 to 256 connections"""
+    sys.path.insert(0, ROOT)
+    seed()
+    print("{:>6} {:>8} {:>10} {:>10} {:>10}".format(
+        "server", "clients", "req/s", "p50 ms", "p99 ms"))
+    for server in ("wsgi", "asgi"):
+        process, port = serve(server, name)
+        try:
+            asyncio.run(load(port, path, 4, 1))
+            for clients in (1, 16, 64, 256):
+                rate, latencies = asyncio.run(
+                    load(port, path, clients, seconds))
+                print("{:>6} {:>8} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+                    server, clients, rate,
+                    latencies[len(latencies) // 2] * 1000,
+                    latencies[int(len(latencies) * 0.99)] * 1000))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "8-cities_by_states",
+         sys.argv[2] if len(sys.argv) > 2 else "/cities_by_states",
+         float(sys.argv[3]) if len(sys.argv) > 3 else 5)
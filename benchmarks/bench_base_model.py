@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""Micro-benchmark of BaseModel construction from a dictionary and of
+to_dict, in objects per second
+
+Usage: ./benchmarks/bench_base_model.py [number of objects]
+Run it on both sides of a change to compare.
+"""
+import sys
+import time
+from datetime import datetime
+from models.place import Place
+
+
+def rate(func, items):
+    """Return how many items per second func handles"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return len(items) / (time.perf_counter() - start)
+
+
+def main(count):
+    """Print the construct-from-dict and to_dict rates"""
+    dicts = [Place(name="House", city_id="c", user_id="u",
+                   number_rooms=3).to_dict() for _ in range(count)]
+    objs = [Place(**d) for d in dicts]
+    stamps = [d["created_at"] for d in dicts]
+
+    print("construct from dict: {:>10.0f} objects/s".format(
+        rate(lambda d: Place(**d), dicts)))
+    print("to_dict:             {:>10.0f} objects/s".format(
+        rate(lambda o: o.to_dict(), objs)))
+    print("strptime:            {:>10.0f} stamps/s".format(
+        rate(lambda s: datetime.strptime(s, "%Y-%m-%dT%H:%M:%S.%f"),
+             stamps)))
+    print("fromisoformat:       {:>10.0f} stamps/s".format(
+        rate(datetime.fromisoformat, stamps)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,135 @@
+#!/usr/bin/python3
+"""Measure the memory of workers forked from a master which loaded the
+web_flask application, the way gunicorn's preload_app does, with and
+without HBNB_GC_FREEZE
+
+Each worker reads every place through /places_search and renders the
+listing pages, then the RSS, PSS and private memory of the master and
+of each worker are read from /proc/<pid>/smaps_rollup (Linux only).
+PSS counts a page shared by n processes as 1/n of it, so the PSS of
+a worker close to its private memory means it shares most of the
+master's pages, and the total PSS is what the deployment really uses.
+
+The storage is the one the HBNB_* variables select, and the page cache
+is off. Places are created first when the storage holds none.
+
+Usage: ./benchmarks/bench_fork_memory.py [workers] [places]
+e.g. ./benchmarks/bench_fork_memory.py 4 100000
+"""
+import gc
+import os
+import signal
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PAGES = ("/states_list?per_page=1000", "/cities_by_states?per_page=1000",
+         "/states?per_page=1000")
+
+
+def seed(count):
+    """Create count places in cities of states if there is none"""
+    from models import storage
+    from models.city import City
+    from models.place import Place
+    from models.state import State
+    from models.user import User
+    if storage.all(Place):
+        return
+    user = User(email="bench@hbnb.io", password="bench")
+    objs = [user]
+    for i in range(count // 500 or 1):
+        state = State(name="State {}".format(i))
+        objs.append(state)
+        for j in range(10):
+            city = City(name="City {}".format(j), state_id=state.id)
+            objs.append(city)
+            objs.extend(Place(name="Place {}".format(k), city_id=city.id,
+                              user_id=user.id, number_rooms=k % 5,
+                              price_by_night=k) for k in range(50))
+    storage.bulk_new(objs)
+    storage.save()
+    storage.close()
+
+
+def memory(pid):
+    """Return the RSS, PSS and private memory of a process, in MiB"""
+    values = {}
+    with open("/proc/{}/smaps_rollup".format(pid)) as f:
+        for line in f:
+            fields = line.split()
+            if fields[-1] == "kB":
+                values[fields[0].rstrip(":")] = int(fields[1]) / 1024
+    return (values["Rss"], values["Pss"],
+            values["Private_Clean"] + values["Private_Dirty"])
+
+
+def work(app):
+    """Read every place and render the listing pages, like the traffic
+    of a worker"""
+    client = app.test_client()
+    for path in PAGES:
+        assert client.get(path).status_code == 200, path
+    page = 1
+    while True:
+        body = client.post("/places_search?per_page=1000&page={}"
+                           .format(page), json={}).get_json()
+        if not body["has_next"]:
+            break
+        page += 1
+    gc.collect()
+
+
+def serve(workers):
+    """Load the application, fork the workers, and print the memory of
+    each once they did their work"""
+    from web_flask.wsgi import app
+    ready, done = os.pipe()
+    pids = []
+    for i in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                work(app)
+                os.write(done, b".")
+                signal.pause()
+            finally:
+                os._exit(1)
+        pids.append(pid)
+    finished = 0
+    while finished < workers:
+        finished += len(os.read(ready, workers))
+    rows = [("master", memory(os.getpid()))]
+    rows.extend(("worker {}".format(i), memory(pid))
+                for i, pid in enumerate(pids))
+    for pid in pids:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    for name, (rss, pss, private) in rows:
+        print("{:>10} {:>10.1f} {:>10.1f} {:>10.1f}".format(
+            name, rss, pss, private))
+    print("{:>10} {:>10} {:>10.1f}".format(
+        "total", "", sum(row[1][1] for row in rows)))
+
+
+def main(workers, places):
+    """Print the memory of the workers without and with gc.freeze"""
+    sys.path.insert(0, ROOT)
+    seed(places)
+    for freeze in ("0", "1"):
+        print("HBNB_GC_FREEZE={}".format(freeze))
+        print("{:>10} {:>10} {:>10} {:>10}".format(
+            "process", "RSS MiB", "PSS MiB", "private"))
+        sys.stdout.flush()
+        env = dict(os.environ, PYTHONPATH=ROOT, HBNB_GC_FREEZE=freeze,
+                   HBNB_PAGE_CACHE_SIZE="0")
+        subprocess.run([sys.executable, __file__, "--serve", str(workers)],
+                       env=env, check=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        serve(int(sys.argv[2]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+             int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
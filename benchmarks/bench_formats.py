@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Compare the snapshot formats of FileStorage: file size, save time
+(encode and write every record) and reload time (read every record)
+
+Usage: ./benchmarks/bench_formats.py [number of records]
+"""
+import os
+import sys
+import tempfile
+import time
+from models.place import Place
+from models.engine import serializers
+
+
+def main(count):
+    """Print size, save and reload time of each format"""
+    records = {}
+    for i in range(count):
+        place = Place(name="House {}".format(i), city_id="c" * 36,
+                      user_id="u" * 36, number_rooms=i % 5,
+                      price_by_night=100 + i % 50, latitude=37.77,
+                      amenity_ids=["a" * 36])
+        records["Place." + place.id] = place.to_dict()
+
+    print("{:<6} {:>12} {:>10} {:>10}".format(
+        "format", "size (B)", "save (s)", "reload (s)"))
+    for name, cls in sorted(serializers.formats.items()):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        fmt = cls()
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            fmt.dump(((k, fmt.encode(v)) for k, v in records.items()), f)
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            loaded = sum(1 for _ in serializers.detect(f).load(f))
+        reload = time.perf_counter() - start
+        assert loaded == count
+        print("{:<6} {:>12} {:>10.3f} {:>10.3f}".format(
+            name, os.path.getsize(path), save, reload))
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Time the relationship loads of the web pages with and without the
+indexes of the models, on DBStorage (e.g. on SQLite with
+HBNB_TYPE_STORAGE=db HBNB_DB_URL=sqlite:///bench.db)
+
+Run it from an empty directory.
+Usage: ./benchmarks/bench_indexes.py [number of places]
+"""
+import random
+import sys
+import time
+import models
+from models.base_model import Base
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+def timed(label, func, count):
+    """Run func, print its time per call"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print("{:<28} {:>10.3f} ms".format(label, elapsed * 1000 / count))
+
+
+def main(count):
+    """Create count places in count / 100 cities of 100 states, then
+    load the cities of the states and the places and reviews of the
+    cities, first without the indexes and then with them"""
+    storage = models.storage
+    engine = storage._DBStorage__engine
+    indexes = [index for table in Base.metadata.sorted_tables
+               for index in table.indexes]
+    users = [User(email="{}@hbnb.io".format(i), password="pwd")
+             for i in range(100)]
+    states = [State(name="State {}".format(i)) for i in range(100)]
+    cities = [City(name="City {}".format(i),
+                   state_id=states[i % 100].id)
+              for i in range(max(count // 100, 100))]
+    with storage.batch():
+        storage.bulk_new(users + states + cities)
+        storage.bulk_new(
+            Place(name="Place {}".format(i), user_id=users[i % 100].id,
+                  city_id=cities[i % len(cities)].id)
+            for i in range(count))
+        storage.save()
+    print("{} places, {} cities".format(count, len(cities)))
+    states = random.sample([s.id for s in states], 20)
+    cities = random.sample([c.id for c in cities], 20)
+
+    def run(label):
+        """Time the loads on a new session"""
+        storage.close()
+        timed(label + " state.cities",
+              lambda: [len(storage.get(State, i).cities) for i in states],
+              len(states))
+        timed(label + " city.places",
+              lambda: [len(storage.get(City, i).places) for i in cities],
+              len(cities))
+        timed(label + " place.reviews",
+              lambda: [len(p.reviews) for p in
+                       storage.get(City, cities[0]).places[:20]], 20)
+        storage.close()
+
+    for index in indexes:
+        index.drop(engine)
+    run("without")
+    for index in indexes:
+        index.create(engine)
+    run("with")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Time storage.query against all() and a loop in Python, on the
+storage the HBNB_* variables select (e.g. FileStorage, or DBStorage on
+SQLite with HBNB_TYPE_STORAGE=db HBNB_DB_URL=sqlite:///bench.db)
+
+Run it from an empty directory.
+Usage: ./benchmarks/bench_query.py [number of places]
+"""
+import random
+import sys
+import time
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+def timed(label, func, count=10):
+    """Run func count times and print its time per call"""
+    start = time.perf_counter()
+    for i in range(count):
+        func()
+    elapsed = time.perf_counter() - start
+    print("{:<40} {:>10.3f} ms".format(label, elapsed * 1000 / count))
+
+
+def main(count):
+    """Create count places in 100 cities, then select some of them"""
+    storage = models.storage
+    user = User(email="bench@hbnb.io", password="pwd")
+    state = State(name="Bench")
+    cities = [City(name="City {}".format(i), state_id=state.id)
+              for i in range(100)]
+    with storage.batch():
+        storage.bulk_new([user, state] + cities)
+        storage.bulk_new(
+            Place(name="Place {:07}".format(random.randrange(count)),
+                  user_id=user.id, city_id=cities[i % 100].id,
+                  price_by_night=random.randrange(500))
+            for i in range(count))
+        storage.save()
+    storage.close()
+    city = cities[0].id
+    places = storage.query(Place)
+
+    def loop(test, key=None):
+        """Select the places passing test with all() and a loop"""
+        found = [p for p in storage.all(Place).values() if test(p)]
+        if key:
+            found.sort(key=key)
+        return found[:10]
+
+    timed("count: all() + loop",
+          lambda: len([p for p in storage.all(Place).values()
+                       if p.city_id == city]))
+    timed("count: query", lambda: places.filter(city_id=city).count())
+    timed("10 cheap in a city: all() + loop",
+          lambda: loop(lambda p: p.city_id == city and
+                       p.price_by_night < 100, lambda p: p.name))
+    timed("10 cheap in a city: query",
+          lambda: places.filter(city_id=city, price_by_night__lt=100)
+          .order_by("name").limit(10).all())
+    places.order_by("name").first()
+    timed("10 by name prefix: all() + loop",
+          lambda: loop(lambda p: p.name.startswith("Place 00012"),
+                       lambda p: p.name))
+    timed("10 by name prefix: query",
+          lambda: places.filter(name__startswith="Place 00012")
+          .order_by("name").limit(10).all())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+"""Compare the latency of BaseModel.save() with FileStorage writing
+inline and with its background writer
+
+Usage: ./benchmarks/bench_save.py [number of records] [number of saves]
+"""
+import os
+import sys
+import tempfile
+import time
+from models import storage
+from models.engine.writer import Writer
+from models.place import Place
+
+
+def main(count, saves):
+    """Print the mean latency of save and the time of the final flush"""
+    os.chdir(tempfile.mkdtemp())
+    for i in range(count):
+        storage.new(Place(name="House {}".format(i), city_id="c" * 36,
+                          user_id="u" * 36, number_rooms=i % 5))
+    storage.save()
+    place = Place(name="House")
+    print("{:<10} {:>10} {:>10}".format("mode", "save (ms)", "flush (s)"))
+    for mode in ("inline", "background"):
+        if mode == "background":
+            storage._FileStorage__writer = Writer(0.05)
+        start = time.perf_counter()
+        for i in range(saves):
+            place.number_rooms = i
+            place.save()
+        save = (time.perf_counter() - start) * 1000 / saves
+        start = time.perf_counter()
+        storage.flush()
+        flush = time.perf_counter() - start
+        print("{:<10} {:>10.2f} {:>10.3f}".format(mode, save, flush))
+    os.remove("file.json")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
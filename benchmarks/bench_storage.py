@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""Time the common operations of the storage the HBNB_* variables
+select, to compare FileStorage with DBStorage (e.g. on SQLite with
+HBNB_TYPE_STORAGE=db HBNB_DB_URL=sqlite:///bench.db)
+
+Run it from an empty directory.
+Usage: ./benchmarks/bench_storage.py [number of places]
+"""
+import random
+import sys
+import time
+import models
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+def timed(label, func, count=1):
+    """Run func, print its time and return its result"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>10.3f} s {:>12.0f} /s".format(label, elapsed,
+                                                   count / elapsed))
+    return result
+
+
+def main(count):
+    """Create count places in 100 cities, then read them back"""
+    storage = models.storage
+    user = User(email="bench@hbnb.io", password="pwd")
+    storage.new(user)
+    state = State(name="Bench")
+    storage.new(state)
+    cities = [City(name="City {}".format(i), state_id=state.id)
+              for i in range(100)]
+    for city in cities:
+        storage.new(city)
+
+    def create():
+        """Create the places and save them once"""
+        ids = []
+        for i in range(count):
+            place = Place(name="Place {}".format(i), user_id=user.id,
+                          city_id=cities[i % 100].id)
+            storage.new(place)
+            ids.append(place.id)
+        storage.save()
+        return ids
+
+    ids = timed("create + save", create, count)
+    storage.close()
+    timed("all(Place)", lambda: len(storage.all(Place)), count)
+    picks = random.sample(ids, min(1000, count))
+    timed("get x {}".format(len(picks)),
+          lambda: [storage.get(Place, i) for i in picks], len(picks))
+    timed("city.places x 100",
+          lambda: [len(storage.get(City, c.id).places) for c in cities],
+          100)
+    place = storage.get(Place, ids[0])
+
+    def update():
+        """Change and save one place 100 times"""
+        for i in range(100):
+            place.number_rooms = i
+            place.save()
+
+    timed("update + save x 100", update, 100)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""Drive a web_flask application with parallel clients and print the
+requests per second at each level of concurrency
+
+The storage is the one the HBNB_* variables select. A few states with
+cities are created first when it holds none.
+
+Usage: ./benchmarks/bench_web.py [app] [path] [requests per client]
+e.g. ./benchmarks/bench_web.py 8-cities_by_states /cities_by_states 200
+"""
+import importlib.util
+import os
+import sys
+import threading
+import time
+from models import storage
+from models.city import City
+from models.state import State
+
+
+def load_app(name):
+    """Return the Flask application of a web_flask module"""
+    path = os.path.join(os.path.dirname(__file__), "..", "web_flask",
+                        name + ".py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def seed(count=50):
+    """Create count states with three cities each if there is none"""
+    if storage.all(State):
+        return
+    for i in range(count):
+        state = State(name="State {}".format(i))
+        storage.new(state)
+        for j in range(3):
+            storage.new(City(name="City {}".format(j), state_id=state.id))
+    storage.save()
+    storage.close()
+
+
+def run(app, path, clients, requests):
+    """Return the requests per second of clients threads sending
+    requests requests each"""
+    errors = []
+
+    def client():
+        """Send requests, counting the failed ones"""
+        with app.test_client() as http:
+            for i in range(requests):
+                if http.get(path).status_code != 200:
+                    errors.append(path)
+
+    threads = [threading.Thread(target=client) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert not errors, "{} failed requests".format(len(errors))
+    return clients * requests / elapsed
+
+
+def main(name, path, requests):
+    """Print the throughput of 1 to 16 clients"""
+    seed()
+    app = load_app(name)
+    print("{:>8} {:>10}".format("clients", "req/s"))
+    for clients in (1, 2, 4, 8, 16):
+        print("{:>8} {:>10.1f}".format(
+            clients, run(app, path, clients, requests)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "8-cities_by_states",
+         sys.argv[2] if len(sys.argv) > 2 else "/cities_by_states",
+         int(sys.argv[3]) if len(sys.argv) > 3 else 200)
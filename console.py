@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """ Console Module """
 import cmd
+import json
 import sys
 from models.base_model import BaseModel
 from models.__init__ import storage
@@ -153,11 +154,11 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-        try:
-            print(storage._FileStorage__objects[key])
-        except KeyError:
+        obj = storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+        else:
+            print(obj)
 
     def help_show(self):
         """ Help information for the show command """
@@ -184,13 +185,12 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        key = c_name + "." + c_id
-
-        try:
-            del(storage.all()[key])
-            storage.save()
-        except KeyError:
+        obj = storage.get(c_name, c_id)
+        if obj is None:
             print("** no instance found **")
+        else:
+            storage.delete(obj)
+            storage.save()
 
     def help_destroy(self):
         """ Help information for the destroy command """
@@ -206,11 +206,10 @@ class HBNBCommand(cmd.Cmd):
             if args not in HBNBCommand.classes:
                 print("** class doesn't exist **")
                 return
-            for k, v in storage._FileStorage__objects.items():
-                if k.split('.')[0] == args:
-                    print_list.append(str(v))
+            for v in storage.query(HBNBCommand.classes[args]):
+                print_list.append(str(v))
         else:
-            for k, v in storage._FileStorage__objects.items():
+            for k, v in storage.all().items():
                 print_list.append(str(v))
 
         print(print_list)
@@ -223,15 +222,79 @@ class HBNBCommand(cmd.Cmd):
     def do_count(self, args):
         """Count current number of class instances"""
         count = 0
-        for k, v in storage._FileStorage__objects.items():
-            if args == k.split('.')[0]:
-                count += 1
+        if args in HBNBCommand.classes:
+            count = storage.query(HBNBCommand.classes[args]).count()
         print(count)
 
     def help_count(self):
         """ """
         print("Usage: count <class_name>")
 
+    def do_convert(self, args):
+        """ Rewrites the storage file in another format """
+        if not args:
+            print("** format name missing **")
+            return
+        if not hasattr(storage, "convert"):
+            print("** file storage only **")
+            return
+        try:
+            storage.convert(args.split(' ')[0])
+        except KeyError:
+            print("** format doesn't exist **")
+
+    def help_convert(self):
+        """ Help information for the convert command """
+        print("Rewrites the storage file in another format (json, pack)")
+        print("[Usage]: convert <format>\n")
+
+    def do_import(self, args):
+        """ Creates the objects of a file of JSON lines """
+        if not args:
+            print("** file name missing **")
+            return
+        records = []
+        try:
+            with open(args.split(' ')[0], encoding="UTF-8") as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    error = HBNBCommand.check_record(line)
+                    if error:
+                        print("** line {}: {} **".format(number, error))
+                    else:
+                        records.append(json.loads(line))
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+            return
+        print(storage.bulk_new(records))
+        storage.save()
+
+    @staticmethod
+    def check_record(line):
+        """ Returns why a line to import is invalid, or None """
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return "invalid JSON line"
+        if not isinstance(record, dict):
+            return "not a JSON object"
+        if record.get('__class__') not in HBNBCommand.classes:
+            return "class doesn't exist"
+        try:
+            # what reload will do with it once saved
+            HBNBCommand.classes[record['__class__']](**record)
+        except (TypeError, ValueError) as e:
+            return "invalid object: {}".format(e)
+        return None
+
+    def help_import(self):
+        """ Help information for the import command """
+        print("Creates the objects of a file holding one JSON object")
+        print("per line, as to_dict() returns them, and prints their count;")
+        print("invalid lines are reported and skipped")
+        print("[Usage]: import <file>\n")
+
     def do_update(self, args):
         """ Updates a certain object with new info """
         c_name = c_id = att_name = att_val = kwargs = ''
@@ -255,11 +318,9 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
 
-        # generate key from class and id
-        key = c_name + "." + c_id
-
-        # determine if key is present
-        if key not in storage.all():
+        # determine if the instance is present
+        new_dict = storage.get(c_name, c_id)
+        if new_dict is None:
             print("** no instance found **")
             return
 
@@ -292,9 +353,6 @@ class HBNBCommand(cmd.Cmd):
 
             args = [att_name, att_val]
 
-        # retrieve dictionary of current objects
-        new_dict = storage.all()[key]
-
         # iterate through attr names and values
         for i, att_name in enumerate(args):
             # block only runs on even iterations
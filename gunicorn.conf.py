@@ -0,0 +1,14 @@
+#!/usr/bin/python3
+"""gunicorn settings of the web_flask application, read by gunicorn
+when run from the root of the repository
+
+The application is loaded before the workers fork (preload_app), so
+they share the loaded storage. The address is HBNB_BIND (0.0.0.0:5000)
+and the number of workers HBNB_WORKERS (2 per CPU plus 1).
+"""
+from os import cpu_count, getenv
+
+wsgi_app = "web_flask.wsgi:app"
+bind = getenv("HBNB_BIND", "0.0.0.0:5000")
+workers = int(getenv("HBNB_WORKERS", 0)) or cpu_count() * 2 + 1
+preload_app = True
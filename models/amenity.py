@@ -13,7 +13,7 @@ class Amenity(BaseModel, Base):
     __tablename__ = "amenities"
 
     if getenv('HBNB_TYPE_STORAGE') == "db":
-        name = Column(String(128), nullable=False)
+        name = Column(String(128), nullable=False, index=True)
         # place_amenities = relationship("Place", secondary=place_amenity)
 
     else:
@@ -30,22 +30,33 @@ class BaseModel:
             created_at: creation date
             updated_at: updated date
         """
-        if kwargs:
-            for key, value in kwargs.items():
-                if key == "created_at" or key == "updated_at":
-                    value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f")
-                if key != "__class__":
-                    setattr(self, key, value)
-        else:
-            self.id = str(uuid.uuid4())
-            self.created_at = self.updated_at = datetime.now()
-        if not self.id:
-            self.id = str(uuid.uuid4())
-        d = datetime.now()
-        if not self.created_at:
-            self.created_at = self.updated_at = d
-        if not self.updated_at:
-            self.updated_at = d
+        # the instance isn't in storage yet, skip the change hook
+        set_attr = super().__setattr__
+        for key, value in kwargs.items():
+            if key == "created_at" or key == "updated_at":
+                if isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+            if key != "__class__":
+                set_attr(key, value)
+        if not kwargs.get("id"):
+            set_attr("id", str(uuid.uuid4()))
+        if not kwargs.get("created_at"):
+            d = datetime.now()
+            set_attr("created_at", d)
+            set_attr("updated_at", d)
+        elif not kwargs.get("updated_at"):
+            set_attr("updated_at", datetime.now())
+
+    def __setattr__(self, name, value):
+        """sets an attribute and tells the storage the instance
+        changed, so only changed instances are serialized again
+        Args:
+            name: attribute name
+            value: attribute value
+        """
+        super().__setattr__(name, value)
+        if name[0] != "_" and hasattr(models, "storage"):
+            models.storage.touch(self)
 
     def __str__(self):
         """returns a string
@@ -73,11 +84,10 @@ class BaseModel:
             returns a dictionary of all the key values in __dict__
         """
         my_dict = dict(self.__dict__)
-        my_dict["__class__"] = str(type(self).__name__)
+        my_dict.pop('_sa_instance_state', None)
+        my_dict["__class__"] = type(self).__name__
         my_dict["created_at"] = self.created_at.isoformat()
         my_dict["updated_at"] = self.updated_at.isoformat()
-        if my_dict.get('_sa_instance_state'):
-            del my_dict['_sa_instance_state']
         return my_dict
 
     def delete(self):
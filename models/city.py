@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 """ City Module for HBNB project """
 from os import getenv
+import models
 from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from models.place import Place
 
 
 class City(BaseModel, Base):
@@ -12,6 +14,8 @@ class City(BaseModel, Base):
     __tablename__ = "cities"
 
     if getenv('HBNB_TYPE_STORAGE') == "db":
+        __table_args__ = (
+            Index("ix_cities_state_id_name", "state_id", "name"),)
         state_id = Column(String(60), ForeignKey("states.id"), nullable=False)
         name = Column(String(128), nullable=False)
         places = relationship("Place", cascade="all, delete", backref="cities")
@@ -19,3 +23,10 @@ class City(BaseModel, Base):
     else:
         state_id = ""
         name = ""
+
+        @property
+        def places(self):
+            """ Returns the list of Place instances with
+            city_id equals to the current City.id """
+            return models.storage.query(Place).filter(
+                city_id=self.id).all()
@@ -2,11 +2,17 @@
 """
 DBStorage
 """
-from os import getenv
+import itertools
+import operator
+from contextlib import contextmanager
+from os import getenv, register_at_fork
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy import create_engine
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.declarative import declarative_base
 from models.base_model import Base
+from models.engine.query import Query
 from models.state import State
 from models.city import City
 from models.user import User
@@ -16,8 +22,44 @@ from models.amenity import Amenity
 
 
 class DBStorage:
+    """
+    Storage of the models in a MySQL database, or in the database of
+    the SQLAlchemy URL HBNB_DB_URL when it is set, e.g.
+    sqlite:///hbnb.db or sqlite:// (in memory)
+
+    SQLite files are opened in WAL mode, so readers do not wait for
+    the writer, with synchronous=NORMAL and the other PRAGMAS below; an
+    in-memory database is a single connection shared by every thread
+
+    __session is a scoped_session registry: each thread (so each
+    request of a threaded server) works in its own session, created on
+    first use and removed by close()
+
+    The connection pool is set by HBNB_DB_POOL_SIZE,
+    HBNB_DB_MAX_OVERFLOW, HBNB_DB_POOL_RECYCLE (seconds) and
+    HBNB_DB_POOL_PRE_PING (1, the default, or 0); a forked child
+    process drops the connections and sessions of its parent, which
+    keeps using them, and opens its own
+
+    __generations numbers the last committed change of the objects of
+    each class (see generations); the classes a session flushes or
+    bulk inserts are kept in its info until it commits
+    """
     __engine = None
     __session = None
+    __clsdict = {"State": State, "City": City, "User": User,
+                 "Place": Place, "Review": Review, "Amenity": Amenity}
+    __generations = {}
+    __clock = itertools.count(1)
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "busy_timeout": 5000,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "mmap_size": 268435456
+    }
 
     def __init__(self):
         """
@@ -28,13 +70,30 @@ class DBStorage:
         db = getenv("HBNB_MYSQL_DB")
         host = getenv("HBNB_MYSQL_HOST")
         env = getenv("HBNB_ENV")
+        url = getenv("HBNB_DB_URL") or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+            user, passwd, host, db)
 
         """"
         Create the database engine
         """
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'
-                                      .format(user, passwd, host, db),
-                                      pool_pre_ping=True)
+        pool = {"pool_pre_ping": getenv("HBNB_DB_POOL_PRE_PING") != "0"}
+        sqlite = url.startswith("sqlite")
+        if sqlite:
+            pool["connect_args"] = {"check_same_thread": False}
+            if url.rstrip("/") == "sqlite:" or ":memory:" in url:
+                pool["poolclass"] = StaticPool
+        options = [("pool_recycle", "HBNB_DB_POOL_RECYCLE")]
+        if "poolclass" not in pool:
+            # a StaticPool holds a single connection and takes no sizes
+            options += [("pool_size", "HBNB_DB_POOL_SIZE"),
+                        ("max_overflow", "HBNB_DB_MAX_OVERFLOW")]
+        for name, var in options:
+            if getenv(var):
+                pool[name] = int(getenv(var))
+        self.__engine = create_engine(url, **pool)
+        if sqlite:
+            event.listen(self.__engine, "connect", self.__pragmas)
+        register_at_fork(after_in_child=self.__forked)
 
         """
         Drop all tables if the environment is set to test
@@ -42,26 +101,217 @@ class DBStorage:
         if env == "test":
             Base.metadata.drop_all(self.__engine)
 
-    def all(self, cls=None):
+    @classmethod
+    def __pragmas(cls, connection, record):
+        """
+        Tune a new SQLite connection
+        """
+        cursor = connection.cursor()
+        for name, value in cls.PRAGMAS.items():
+            cursor.execute("PRAGMA {} = {}".format(name, value))
+        cursor.close()
+
+    def __forked(self):
+        """
+        Forget the pooled connections and the sessions inherited from
+        the parent process, without closing what the parent still uses
+        """
+        self.__engine.dispose(close=False)
+        if self.__session is not None:
+            self.__session.registry.clear()
+
+    def all(self, cls=None, load=None, order_by=None, limit=None,
+            offset=0):
         """
         Query and return all objects of a specific class or all classes
+
+        load lists the relationships of cls to fetch with it, as
+        attribute paths like "cities" or "cities.places": each one costs
+        a single extra query instead of one per object
+
+        order_by names the column to sort the objects of cls on, with a
+        leading "-" for descending order (ties are sorted by id); limit
+        and offset select a page of them. All three are passed to the
+        query, so only the rows of the page are read
+        """
+        return dict(self.iterate(cls, load, order_by=order_by,
+                                 limit=limit, offset=offset))
+
+    def iterate(self, cls=None, load=None, chunk=1000, order_by=None,
+                limit=None, offset=0):
+        """
+        Yield the (key, object) pairs of a specific class or all classes
+
+        Rows are fetched chunk at a time, and the session only holds
+        weak references to the objects it loaded, so the caller can go
+        through any number of rows without keeping them all in memory
         """
-        dic = {}
+        paged = order_by or limit is not None or offset
         if cls:
             if type(cls) is str:
-                cls = eval(cls)
-            query = self.__session.query(cls)
+                cls = self.__class_of(cls)
+            lista = [cls]
+        elif paged:
+            raise ValueError("order_by, limit and offset need a class")
+        else:
+            lista = list(self.__clsdict.values())
+        for clase in lista:
+            prefix = clase.__name__ + "."
+            query = self.__session.query(clase)
+            if paged:
+                query = query.order_by(*self.__order(clase, order_by))
+                query = query.offset(offset or None).limit(limit)
+            query = query.yield_per(chunk)
+            if load:
+                query = query.options(*self.__options(clase, load))
             for elem in query:
-                key = "{}.{}".format(type(elem).__name__, elem.id)
-                dic[key] = elem
+                yield prefix + elem.id, elem
+
+    @classmethod
+    def __class_of(cls, name):
+        """
+        Return the model class of a class name, looked up among the
+        models only
+        Exceptions:
+            ValueError: when no model has that name
+        """
+        try:
+            return cls.__clsdict[name]
+        except (KeyError, TypeError):
+            raise ValueError("Unknown class: {!r}".format(name))
+
+    @staticmethod
+    def __order(cls, order_by):
+        """
+        Return the ORDER BY clauses of an attribute name, with a leading
+        "-" for descending order, then id to keep pages stable
+        """
+        order_by = order_by or "id"
+        columns = [getattr(cls, order_by.lstrip("-"))]
+        if order_by.lstrip("-") != "id":
+            columns.append(cls.id)
+        if order_by.startswith("-"):
+            columns = [column.desc() for column in columns]
+        return columns
+
+    @staticmethod
+    def __options(cls, load):
+        """
+        Return the loader options of relationship paths: collections
+        are loaded by a second SELECT ... IN query, single objects by a
+        join
+        """
+        options = []
+        for path in load:
+            option = None
+            target = cls
+            for name in path.split("."):
+                rel = inspect(target).relationships[name]
+                loader = selectinload if rel.uselist else joinedload
+                if option is None:
+                    option = loader(rel.class_attribute)
+                else:
+                    option = getattr(option, loader.__name__)(
+                        rel.class_attribute)
+                target = rel.mapper.class_
+            options.append(option)
+        return options
+
+    def query(self, cls):
+        """
+        Return the query of every object of a class (see Query)
+        """
+        if type(cls) is str:
+            cls = self.__class_of(cls)
+        return Query(self, cls)
+
+    def select(self, query):
+        """
+        Run a query as a single SELECT and yield its objects, or the
+        tuples of its columns
+        """
+        if query.columns:
+            for row in self.__compile(query):
+                yield tuple(row)
+        else:
+            yield from self.__compile(query)
+
+    def count(self, query):
+        """
+        Return the number of objects a query selects, counted by the
+        database
+        """
+        return self.__compile(query).order_by(None).count()
+
+    def __compile(self, query):
+        """
+        Return the SQLAlchemy query of a Query
+        """
+        cls = query.cls
+        if query.columns:
+            sql = self.__session.query(
+                *[getattr(cls, attr) for attr in query.columns])
         else:
-            lista = [State, City, User, Place, Review, Amenity]
-            for clase in lista:
-                query = self.__session.query(clase)
-                for elem in query:
-                    key = "{}.{}".format(type(elem).__name__, elem.id)
-                    dic[key] = elem
-        return dic
+            sql = self.__session.query(cls)
+        for attr, op, value in query.conditions:
+            column = getattr(cls, attr)
+            if op == "in":
+                sql = sql.filter(column.in_(value))
+            elif op == "startswith":
+                sql = sql.filter(column.startswith(value, autoescape=True))
+            elif op == "has":
+                sql = sql.filter(column.any(id=value))
+            else:
+                sql = sql.filter(getattr(operator, op)(column, value))
+        if query.ordering or query.skip or query.size is not None:
+            sql = sql.order_by(*self.__order(cls, query.ordering))
+            sql = sql.offset(query.skip or None).limit(query.size)
+        return sql
+
+    def generations(self, *classes):
+        """
+        Return the generations of classes, one number per class, which
+        change whenever objects of the class are committed by this
+        process; what was computed from the objects of classes is still
+        valid while their generations are the same
+        """
+        return tuple([self.__generations.get(
+            cls if type(cls) is str else cls.__name__, 0)
+            for cls in classes])
+
+    @classmethod
+    def __flushed(cls, session, context):
+        """
+        Keep the classes of the objects a session flushed
+        """
+        changed = session.info.setdefault("changed", set())
+        for obj in itertools.chain(session.new, session.dirty,
+                                   session.deleted):
+            changed.add(type(obj).__name__)
+
+    @classmethod
+    def __committed(cls, session):
+        """
+        Give the classes a session changed a new generation, once their
+        objects are committed
+        """
+        for name in session.info.pop("changed", ()):
+            cls.__generations[name] = next(cls.__clock)
+
+    @staticmethod
+    def __rolled_back(session):
+        """
+        Forget the classes a session changed
+        """
+        session.info.pop("changed", None)
+
+    def get(self, cls, id):
+        """
+        Return the object of a class with the given id, or None
+        """
+        if type(cls) is str:
+            cls = self.__class_of(cls)
+        return self.__session.get(cls, id)
 
     def new(self, obj):
         """
@@ -69,18 +319,74 @@ class DBStorage:
         """
         self.__session.add(obj)
 
+    def bulk_new(self, objs, chunk=1000):
+        """
+        Insert many objects, or their to_dict() dictionaries, with one
+        executemany per chunk of objects of the same class; save()
+        commits them. The objects are not attached to the session.
+        Return the number of objects inserted
+        """
+        count = 0
+        objects = []
+        changed = self.__session.info.setdefault("changed", set())
+        for obj in objs:
+            if isinstance(obj, dict):
+                obj = self.__class_of(obj.get("__class__"))(**obj)
+            objects.append(obj)
+            changed.add(type(obj).__name__)
+            if len(objects) == chunk:
+                self.__session.bulk_save_objects(objects)
+                count += len(objects)
+                objects = []
+        self.__session.bulk_save_objects(objects)
+        return count + len(objects)
+
+    @contextmanager
+    def batch(self):
+        """
+        Defer save() to the end of the block, where it commits once if
+        it was called in the block; the state is kept in the info of
+        the session, so it only applies to the current thread
+        """
+        info = self.__session.info
+        info["batch"] = info.get("batch", 0) + 1
+        try:
+            yield self
+        finally:
+            info["batch"] -= 1
+        if not info["batch"] and info.pop("deferred", False):
+            self.save()
+
+    def touch(self, obj):
+        """
+        Nothing to do, the session already tracks changed objects
+        and only flushes those on commit
+        """
+        pass
+
     def save(self):
         """
         Commit all changes of the current database session
         """
+        info = self.__session.info
+        if info.get("batch"):
+            info["deferred"] = True
+            return
         self.__session.commit()
 
+    def flush(self):
+        """
+        Nothing to do, save commits synchronously and the database
+        makes commits durable
+        """
+        pass
+
     def delete(self, obj=None):
         """
         Delete an object from the current database session if it is not None
         """
         if obj:
-            self.session.delete(obj)
+            self.__session.delete(obj)
 
     def reload(self):
         """
@@ -89,11 +395,16 @@ class DBStorage:
         """
         Base.metadata.create_all(self.__engine)
         sec = sessionmaker(bind=self.__engine, expire_on_commit=False)
-        Session = scoped_session(sec)
-        self.__session = Session()
+        event.listen(sec, "after_flush", self.__flushed)
+        event.listen(sec, "after_commit", self.__committed)
+        event.listen(sec, "after_rollback", self.__rolled_back)
+        if self.__session is not None:
+            self.__session.remove()
+        self.__session = scoped_session(sec)
 
     def close(self):
         """
-        Close the current database session
+        Close the session of the current thread and give its connection
+        back to the pool; the next call opens a new session
         """
-        self.__session.close()
+        self.__session.remove()
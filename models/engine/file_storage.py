@@ -1,6 +1,20 @@
 #!/usr/bin/python3
 """This is the file storage class for AirBnB"""
+import heapq
+import itertools
 import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from os import getenv
+from sys import intern
+from types import MappingProxyType
+from models.engine import serializers
+from models.engine.query import Query
+from models.engine.writer import Writer
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -16,10 +30,100 @@ class FileStorage:
     Attributes:
         __file_path: path to the JSON file
         __objects: objects will be stored with key clsname.objectID
+        __by_class: the same objects bucketed by their class
+        __refs: reverse indexes of keys by (class name, foreign key)
+            and the id the foreign key points to; a list of ids, such
+            as Place.amenity_ids, files the key under each of them
+        __ref_lists: the id lists standing for a relationship, by
+            class name then relationship, so queries on Place.amenities
+            work as on DBStorage
+        __pending: objects new, updated (or deleted, as None) since
+            the last save, by key
+        __cache: encoded records of the objects unchanged since they
+            were last serialized or read, by key
+        __raw: records read but not turned into objects yet, by class
+            name then key, as encoded in the file when __cache holds
+            them too, else as dictionaries
+        __generations: number of the last change of the objects of a
+            class, by class name, from __clock which every storage
+            shares, so a number is never given twice
+        __memo: sorted lookups made since the last change of their
+            class, by class name then (attribute, id, order)
+        __sorted: sorted indexes of the keys of a class by the value
+            of one attribute, by (class name, attribute), built the
+            first time all() orders on them
+        __stamp: inode, size and modification time of the file when it
+            was last read or written
+        __log_offset: bytes of the log already replayed or written
+
+    The file is read and written one record at a time (see json_stream),
+    so only the objects themselves are held in memory, their ids and
+    foreign keys interned so that each id is one object. Its format (see
+    serializers) is detected when it is read; save keeps writing that
+    format unless HBNB_FILE_FORMAT names another one ("json" or "pack").
+
+    In lazy mode (HBNB_LAZY_RELOAD=1) reload only keeps the records it
+    reads in __raw; an object is built the first time it is reached
+    through all(), get() or a relationship property. The dictionary of
+    a record is only used to index it: what is kept is its encoded
+    record, the one __cache holds to write it again, decoded when a
+    query or an object needs it.
+
+    In mapped mode (HBNB_FILE_MMAP=1, lazy as well) a packed file is
+    mapped in memory instead of being read: get() decodes a single
+    record found through the index of the file (see PackFile), all(cls)
+    and the relationship properties only the records of their class.
+
+    A snapshot is written to __file_path + ".tmp" and renamed over
+    __file_path, so a crash leaves either the old or the new one.
+    HBNB_FSYNC sets when files are forced to disk: "always" (every
+    snapshot and every append to the log), "batched" (compactions,
+    flush() and the snapshots of the writer thread, the default) or
+    "never".
+
+    With HBNB_BACKGROUND_SAVE=1 save only encodes the changed objects
+    and hands their records, or None for the deleted ones, to a writer
+    thread, which keeps a copy of every record to write the snapshot
+    from; saves made within HBNB_SAVE_DELAY seconds (0.05 by default)
+    of each other are written once. The whole snapshot is only handed
+    over by the first save after a reload or a compaction. flush()
+    waits for the writer.
+
+    In journal mode (HBNB_FILE_JOURNAL=1) save only appends the pending
+    records to __file_path + ".log"; once the log holds
+    HBNB_JOURNAL_COMPACT records (1000 by default) it is folded into
+    the snapshot at __file_path.
     """
     __file_path = "file.json"
     __objects = {}
+    __by_class = {}
+    __refs = {}
+    __ref_values = {}
+    __pending = {}
+    __cache = {}
+    __raw = {}
+    __sorted = {}
+    __generations = {}
+    __memo = {}
+    __clock = itertools.count(1)
+    __ref_attrs = {
+        "City": ("state_id",),
+        "Place": ("city_id", "user_id", "amenity_ids"),
+        "Review": ("place_id", "user_id")
+    }
+    __ref_lists = {
+        "Place": {"amenities": "amenity_ids"}
+    }
+    # fields whose values __shared interns, by class name
+    __ids = {name: ("__class__", "id") + attrs
+             for name, attrs in __ref_attrs.items()}
+    __ids[None] = ("__class__", "id")
+    # longest other string values __shared interns
+    __short = 16
+    # fields BaseModel sets when a record lacks them
+    __filled = ("id", "created_at", "updated_at")
     __clsdict = {
+        "BaseModel": BaseModel,
         "User": User,
         "State": State,
         "City": City,
@@ -28,17 +132,184 @@ class FileStorage:
         "Review": Review
     }
 
-    def all(self, cls=None):
+    def __init__(self):
+        """reads the format, journal and reload settings from the
+        environment"""
+        self.__mmap = getenv("HBNB_FILE_MMAP") == "1"
+        self.__mapped = None
+        name = getenv("HBNB_FILE_FORMAT")
+        default = "pack" if self.__mmap else "json"
+        self.__format = serializers.formats[name or default]()
+        self.__format_pinned = name is not None
+        self.__lazy = getenv("HBNB_LAZY_RELOAD") == "1" or self.__mmap
+        self.__journal = getenv("HBNB_FILE_JOURNAL") == "1"
+        self.__compact_after = int(getenv("HBNB_JOURNAL_COMPACT", 1000))
+        self.__log_size = 0
+        self.__stamp = None
+        self.__log_offset = 0
+        self.__batch = 0
+        self.__deferred = False
+        self.__fsync = getenv("HBNB_FSYNC", "batched")
+        if self.__fsync not in ("always", "batched", "never"):
+            raise ValueError("Unknown HBNB_FSYNC: {}".format(self.__fsync))
+        self.__writer = None
+        self.__reset_hand_over()
+        if getenv("HBNB_BACKGROUND_SAVE") == "1":
+            self.__writer = Writer(float(getenv("HBNB_SAVE_DELAY", 0.05)))
+            os.register_at_fork(after_in_child=self.__reset_hand_over)
+
+    def all(self, cls=None, load=None, order_by=None, limit=None,
+            offset=0):
         """returns a dictionary
+        Args:
+            cls: optional class (or class name) to filter on
+            load: relationships to fetch with the objects (see
+                DBStorage.all), ignored as they are read from the
+                reverse indexes
+            order_by: attribute to sort the objects of cls on, with a
+                leading "-" for descending order; ties are sorted by id
+            limit: maximum number of objects to return
+            offset: number of objects to skip
         Return:
-            returns a dictionary of __object
+            returns a dictionary of __object, or a read-only view
+            of the objects of cls when it is given, or a new
+            dictionary of the page of objects of cls in order when
+            order_by, limit or offset is given
+        Exceptions:
+            ValueError: when order_by, limit or offset is given
+                without cls
         """
         cls = cls if not isinstance(cls, str) else self.__clsdict.get(cls)
+        if order_by or limit is not None or offset:
+            return self.__page(cls, order_by or "id", limit, offset)
+        if self.__mapped:
+            for name, kind in self.__clsdict.items():
+                if not cls or issubclass(kind, cls):
+                    self.__unmap(name + ".")
+        for name in list(self.__raw):
+            if not cls or issubclass(self.__clsdict[name], cls):
+                self.__hydrate(name)
         if cls:
-            return {k: v for k, v in self.__objects.items()
-                    if isinstance(v, cls)}
+            buckets = [bucket for kind, bucket in self.__by_class.items()
+                       if issubclass(kind, cls)]
+            if len(buckets) == 1:
+                return MappingProxyType(buckets[0])
+            merged = {}
+            for bucket in buckets:
+                merged.update(bucket)
+            return MappingProxyType(merged)
         return self.__objects
 
+    def iterate(self, cls=None, load=None, order_by=None, limit=None,
+                offset=0):
+        """returns an iterator over the (key, object) pairs of all(cls),
+        safe to use while objects are added or deleted
+        Args:
+            cls: optional class (or class name) to filter on
+            load: relationships to fetch with the objects, ignored
+            order_by, limit, offset: page to return (see all)
+        """
+        return iter(list(self.all(cls, load, order_by, limit,
+                                  offset).items()))
+
+    def get(self, cls, id):
+        """returns a single object
+        Args:
+            cls: class (or class name) of the object
+            id: id of the object
+        Return:
+            returns the object, or None if it doesn't exist
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        return self.__fetch("{}.{}".format(name, id))
+
+    def lookup(self, cls, attr, value, order_by=None):
+        """returns the objects of a class whose foreign key attr
+        points to value, using the reverse indexes
+        A sorted lookup is kept until the objects of the class
+        change, so it is only sorted again after a change.
+        Args:
+            cls: class (or class name) of the objects
+            attr: foreign key attribute, e.g. place_id
+            value: id the foreign key points to
+            order_by: optional attribute to sort the objects on (see
+                Query.order_by)
+        Return:
+            returns a list of objects
+        """
+        name = cls if isinstance(cls, str) else cls.__name__
+        if order_by:
+            memo = self.__memo.setdefault(name, {})
+            found = memo.get((attr, value, order_by))
+            if found is None:
+                found = self.query(name).filter(
+                    **{attr: value}).order_by(order_by).all()
+                memo[(attr, value, order_by)] = found
+            return list(found)
+        if self.__mapped:
+            self.__unmap(name + ".")
+        keys = self.__refs.get((name, attr), {}).get(value, ())
+        return [self.__fetch(key) for key in list(keys)]
+
+    def query(self, cls):
+        """returns the query of every object of a class (see Query)
+        Args:
+            cls: class (or class name) of the objects
+        """
+        if isinstance(cls, str):
+            cls = self.__clsdict[cls]
+        return Query(self, cls)
+
+    def select(self, query):
+        """runs a query, answering it from the reverse indexes or a
+        sorted index when one applies; only the objects returned are
+        built from their records
+        Args:
+            query: Query of this storage
+        Return:
+            returns an iterator over the objects, or over the tuples of
+            query.columns
+        """
+        for key, obj in self.__matches(query):
+            if query.columns:
+                yield tuple([self.__value(obj, attr)
+                             for attr in query.columns])
+            elif isinstance(obj, dict):
+                yield self.__fetch(key)
+            else:
+                yield obj
+
+    def count(self, query):
+        """returns the number of objects a query selects, without
+        building them
+        Args:
+            query: Query of this storage
+        """
+        if not query.conditions and not query.skip and query.size is None:
+            name = query.cls.__name__
+            if self.__mapped:
+                self.__unmap(name + ".")
+            return (len(self.__by_class.get(query.cls, ())) +
+                    len(self.__raw.get(name, ())))
+        count = 0
+        for match in self.__matches(query):
+            count += 1
+        return count
+
+    def generations(self, *classes):
+        """returns the generations of classes, which change whenever
+        objects of the class are added, changed, deleted, saved or
+        reloaded; what was computed from the objects of classes is
+        still valid while their generations are the same
+        Args:
+            classes: classes (or class names)
+        Return:
+            returns a tuple of numbers, one per class
+        """
+        return tuple([self.__generations.get(
+            cls if isinstance(cls, str) else cls.__name__, 0)
+            for cls in classes])
+
     def new(self, obj):
         """sets __object to given obj
         Args:
@@ -46,43 +317,1019 @@ class FileStorage:
         """
         if obj:
             key = "{}.{}".format(type(obj).__name__, obj.id)
-            self.__objects[key] = obj
+            self.__register(key, obj)
+            self.__pending[key] = obj
+            self.__bump(type(obj).__name__)
+
+    def bulk_new(self, objs):
+        """adds many objects at once
+        Dictionaries holding an id and both timestamps are kept as raw
+        records, built into objects on first access; the next save
+        encodes them straight away. Every dictionary is checked before
+        any object is added.
+        Args:
+            objs: iterable of objects or of their to_dict() dictionaries
+        Return:
+            returns the number of objects added
+        Exceptions:
+            ValueError: when a dictionary names no known class, or holds
+                an invalid id or timestamp
+        """
+        objs = [self.__checked(obj) if isinstance(obj, dict) else obj
+                for obj in objs]
+        count = 0
+        names = set()
+        for obj in objs:
+            if isinstance(obj, dict):
+                if ("id" in obj and "created_at" in obj and
+                        "updated_at" in obj):
+                    key = "{}.{}".format(obj["__class__"], obj["id"])
+                    self.__keep(key, obj, obj)
+                    self.__pending[key] = obj
+                    names.add(obj["__class__"])
+                    count += 1
+                    continue
+                obj = self.__clsdict[obj["__class__"]](**obj)
+            key = "{}.{}".format(type(obj).__name__, obj.id)
+            self.__register(key, obj)
+            self.__pending[key] = obj
+            names.add(type(obj).__name__)
+            count += 1
+        self.__bump(*names)
+        return count
+
+    @classmethod
+    def __checked(cls, value):
+        """returns the dictionary of an object given to bulk_new once it
+        is checked, as the object built from it would be
+        Args:
+            value: dictionary of the object
+        Exceptions:
+            ValueError: when it names no known class, or holds an
+                invalid id or timestamp
+        """
+        if value.get("__class__") not in cls.__clsdict:
+            raise ValueError("Unknown class: {!r}".format(
+                value.get("__class__")))
+        if "id" in value and (type(value["id"]) is not str or
+                              not value["id"]):
+            raise ValueError("Invalid id: {!r}".format(value["id"]))
+        for name in serializers.TIMESTAMPS:
+            stamp = value.get(name)
+            if stamp is None or isinstance(stamp, datetime):
+                continue
+            try:
+                datetime.fromisoformat(stamp)
+            except (TypeError, ValueError):
+                raise ValueError("Invalid {}: {!r}".format(name, stamp))
+        return value
+
+    @contextmanager
+    def batch(self):
+        """defers save() to the end of the block, where it runs once if
+        it was called in the block
+        """
+        self.__batch += 1
+        try:
+            yield self
+        finally:
+            self.__batch -= 1
+        if not self.__batch and self.__deferred:
+            self.__deferred = False
+            self.save()
+
+    def touch(self, obj):
+        """flags a stored object as changed, so the next save
+        serializes it again
+        Args:
+            obj: given object
+        """
+        key = "{}.{}".format(type(obj).__name__, obj.id)
+        if self.__objects.get(key) is obj:
+            self.__cache.pop(key, None)
+            self.__pending[key] = obj
+            self.__index(key, obj)
+            self.__bump(type(obj).__name__)
 
     def save(self):
-        """serialize the file path to JSON file path
+        """serialize the file path to JSON file path, or append the
+        pending changes to the log in journal mode
+        """
+        if self.__batch:
+            self.__deferred = True
+            return
+        self.__bump(*{key.partition(".")[0] for key in self.__pending})
+        if self.__journal:
+            self.__append()
+            if self.__log_size >= self.__compact_after:
+                self.compact()
+            return
+        if self.__writer:
+            self.__hand_over()
+            return
+        # the records of a writer thread no longer match the file
+        self.__rebase = True
+        self.__write(self.__snapshot().items(), self.__format,
+                     self.__fsync == "always")
+        self.__remap()
+
+    def compact(self):
+        """fold the log into a new snapshot
+        The log is only dropped once the snapshot is renamed, and
+        replaying it again is harmless.
         """
-        my_dict = {}
-        for key, value in self.__objects.items():
-            my_dict[key] = value.to_dict()
-        with open(self.__file_path, 'w', encoding="UTF-8") as f:
-            json.dump(my_dict, f)
+        if self.__writer:
+            self.__writer.flush()
+        self.__rebase = True
+        self.__write(self.__snapshot().items(), self.__format,
+                     self.__fsync != "never")
+        self.__remap()
+
+    def flush(self):
+        """wait for the saves handed to the writer thread, then force
+        the files to disk unless HBNB_FSYNC is "never"
+        """
+        if self.__writer:
+            self.__writer.flush()
+            if self.__mmap and not self.__mapped:
+                self.__remap()
+        if self.__fsync == "never":
+            return
+        for path in (self.__file_path, self.__file_path + ".log"):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.__sync_dir()
+
+    def convert(self, name):
+        """rewrite the file in another format
+        Args:
+            name: name of the format, "json" or "pack"
+        Exceptions:
+            KeyError: when the format doesn't exist
+        """
+        self.__decode_raw()
+        self.__format = serializers.formats[name]()
+        self.__format_pinned = True
+        self.__cache.clear()
+        self.compact()
 
     def reload(self):
-        """serialize the file path to JSON file path
+        """serialize the file path to JSON file path, then replay the
+        log written in journal mode
+        The objects and records read before, unless changed since the
+        last save, are dropped when the file no longer holds them; the
+        changes not saved yet are kept over the records of the file.
         """
+        if self.__writer:
+            self.__writer.flush()
+            self.__rebase = True
+        self.__stamp = None
+        stale = {key for key in self.__objects if key not in self.__pending}
+        for bucket in self.__raw.values():
+            stale.update(key for key in bucket if key not in self.__pending)
         try:
-            with open(self.__file_path, 'r', encoding="UTF-8") as f:
-                for key, value in (json.load(f)).items():
-                    value = eval(value["__class__"])(**value)
-                    self.__objects[key] = value
+            with open(self.__file_path, 'rb') as f:
+                self.__stamp = self.__stat(os.fstat(f.fileno()))
+                reader = serializers.detect(f)
+                if (not self.__format_pinned and
+                        reader.name != self.__format.name):
+                    self.__decode_raw()
+                    self.__format = reader
+                    self.__cache.clear()
+                if self.__mmap and reader.name == "pack":
+                    # the mapped records are not in the sorted indexes
+                    self.__sorted.clear()
+                    self.__map(f)
+                    # objects are read again from the new map
+                elif reader.name == self.__format.name:
+                    # encode like the file, whose records fill __cache
+                    self.__decode_raw()
+                    self.__format = reader
+                    self.__cache.clear()
+                    for key, value, record in reader.records(f):
+                        if key not in self.__pending:
+                            self.__load(key, value, record)
+                        stale.discard(key)
+                else:
+                    for key, value in reader.load(f):
+                        if key not in self.__pending:
+                            self.__load(key, value)
+                        stale.discard(key)
         except FileNotFoundError:
             pass
+        self.__drop(stale)
+        self.__replay()
+        self.__bump(*self.__clsdict)
 
     def delete(self, obj=None):
-        """delete an object from __objects if the given object exists
+        """delete an object if it exists, whether it was built or is
+        still a raw or mapped record
         Args:
             obj: given object
-        Exceptions:
-            KeyError: when object doesn't exist
         """
         if obj:
-            key = "{}.{}".format(type(obj).__name__, obj.id)
-            try:
-                del self.__objects[key]
-            except KeyError:
-                pass
+            name = type(obj).__name__
+            key = "{}.{}".format(name, obj.id)
+            found = self.__objects.pop(key, None) is not None
+            if found:
+                del self.__by_class[type(obj)][key]
+            if self.__raw.get(name, {}).pop(key, None) is not None:
+                found = True
+            if self.__mapped:
+                # the record may be in the file still
+                self.__mapped.discard(key)
+                found = True
+            if found:
+                self.__cache.pop(key, None)
+                self.__pending[key] = None
+            self.__unindex(key, name)
+            self.__unsort(key, name)
+            self.__bump(name)
+
+    def __drop(self, keys):
+        """removes the objects or raw records of keys the file no longer
+        holds, and their entries in the indexes
+        Args:
+            keys: keys of the objects
+        """
+        for key in keys:
+            name = key.partition(".")[0]
+            obj = self.__objects.pop(key, None)
+            if obj is not None:
+                del self.__by_class[type(obj)][key]
+            else:
+                self.__raw.get(name, {}).pop(key, None)
+            self.__cache.pop(key, None)
+            self.__unindex(key, name)
+            self.__unsort(key, name)
+
+    def __bump(self, *names):
+        """gives the classes a new generation and forgets their sorted
+        lookups
+        Args:
+            names: class names
+        """
+        for name in names:
+            self.__generations[name] = next(self.__clock)
+            self.__memo.pop(name, None)
+
+    def __register(self, key, obj):
+        """adds obj to __objects and to the indexes
+        Args:
+            key: key of obj in __objects
+            obj: given object
+        """
+        self.__objects[key] = obj
+        self.__by_class.setdefault(type(obj), {})[key] = obj
+        self.__cache.pop(key, None)
+        if self.__raw:
+            self.__raw.get(type(obj).__name__, {}).pop(key, None)
+        if self.__mapped:
+            self.__mapped.discard(key)
+        self.__index(key, obj)
+
+    def __load(self, key, value, record=None):
+        """adds a record read from disk, keeping it raw in lazy mode
+        Args:
+            key: key of the record
+            value: dictionary of the record
+            record: the record as encoded in the file, kept in __cache
+                unless building the object adds fields to it
+        """
+        value = self.__shared(value)
+        if not all(value.get(name) for name in self.__filled):
+            record = None
+        if not self.__lazy:
+            if self.__mapped:
+                self.__mapped.discard(key)
+            self.__register(key, self.__clsdict[value["__class__"]](**value))
+        else:
+            self.__keep(key, value, value if record is None else record)
+        if record is not None:
+            self.__cache[key] = record
+
+    @classmethod
+    def __shared(cls, value):
+        """interns the class name, id, foreign keys and short strings of
+        a record, in place: the objects read share one copy of each id
+        their foreign keys point to, or of a name many of them hold,
+        instead of holding their own. Longer values, mostly unique text
+        such as descriptions, are left as read, and field names are
+        interned when set as attributes.
+        Args:
+            value: dictionary of the record
+        Return:
+            returns value
+        """
+        ids = cls.__ids.get(value.get("__class__"), cls.__ids[None])
+        for name, item in value.items():
+            if type(item) is str:
+                if len(item) <= cls.__short or name in ids:
+                    value[name] = intern(item)
+            elif type(item) is list and name in ids:
+                value[name] = [intern(i) if type(i) is str else i
+                               for i in item]
+        return value
+
+    def __keep(self, key, value, record):
+        """adds a raw record, in place of the object of the same key
+        Args:
+            key: key of the record
+            value: dictionary of the record, to index it
+            record: what __raw keeps, the encoded record or value
+        """
+        if self.__mapped:
+            self.__mapped.discard(key)
+        obj = self.__objects.pop(key, None)
+        if obj is not None:
+            del self.__by_class[type(obj)][key]
+        self.__raw.setdefault(value["__class__"], {})[key] = record
+        self.__cache.pop(key, None)
+        self.__index(key, value)
+
+    def __raw_record(self, record):
+        """returns the dictionary of a raw record, decoding it if __raw
+        keeps it encoded
+        Args:
+            record: record of __raw
+        """
+        if isinstance(record, dict):
+            return record
+        return self.__shared(self.__format.decode(record))
+
+    def __decode_raw(self):
+        """decodes the raw records kept encoded, before the format
+        which encoded them is replaced
+        """
+        for bucket in self.__raw.values():
+            for key, value in bucket.items():
+                bucket[key] = self.__raw_record(value)
+
+    def __fetch(self, key):
+        """returns the object stored under key, building it from its
+        raw record on first access
+        Args:
+            key: key of the object
+        Return:
+            returns the object, or None if it doesn't exist
+        """
+        obj = self.__objects.get(key)
+        if obj is None and self.__raw:
+            value = self.__raw.get(key.partition(".")[0], {}).pop(key, None)
+            if value is not None:
+                value = self.__raw_record(value)
+                obj = self.__clsdict[value["__class__"]](**value)
+                self.__register(key, obj)
+        if obj is None and self.__mapped:
+            value = self.__mapped.pop(key)
+            if value is not None:
+                obj = self.__clsdict[value["__class__"]](**value)
+                self.__register(key, obj)
+        return obj
+
+    def __map(self, f):
+        """maps a packed file in place of the raw records read from the
+        previous one; the records of the changes not saved yet stay
+        Args:
+            f: packed file open for reading
+        """
+        if self.__mapped:
+            self.__mapped.close()
+        for name, bucket in list(self.__raw.items()):
+            for key in [key for key in bucket if key not in self.__pending]:
+                del bucket[key]
+                self.__unindex(key, name)
+                self.__cache.pop(key, None)
+            if not bucket:
+                del self.__raw[name]
+        self.__mapped = serializers.PackFile(f)
+        for key in self.__pending:
+            self.__mapped.discard(key)
+
+    def __remap(self):
+        """maps the file just written, in mapped mode"""
+        if self.__mmap and self.__format.name == "pack":
+            with open(self.__file_path, 'rb') as f:
+                self.__map(f)
+
+    def __unmap(self, prefix=""):
+        """moves the mapped records whose key starts with prefix to the
+        raw records, unless their object is already in memory
+        Args:
+            prefix: start of the keys, e.g. "Place."
+        """
+        for key, value in self.__mapped.items(prefix):
+            if key not in self.__objects:
+                self.__load(key, value)
+
+    def __hydrate(self, name):
+        """builds the objects of every raw record of a class
+        Args:
+            name: class name of the records
+        """
+        cls = self.__clsdict[name]
+        for key, value in self.__raw.pop(name).items():
+            self.__register(key, cls(**self.__raw_record(value)))
+
+    def __record(self, key, obj):
+        """returns the encoded record of obj, serializing it only if it
+        changed since it was last serialized
+        Args:
+            key: key of obj in __objects
+            obj: given object, or its raw record
+        """
+        record = self.__cache.get(key)
+        if record is None:
+            if isinstance(obj, (str, bytes)):
+                record = obj
+            else:
+                if not isinstance(obj, dict):
+                    obj = obj.to_dict()
+                record = self.__format.encode(obj)
+            self.__cache[key] = record
+        return record
+
+    def __snapshot(self, changes=None):
+        """returns the encoded record of every object by key, reading
+        the whole mapped file first in mapped mode
+        Only the pending objects are encoded, unless some were never
+        serialized: __cache then holds a record for every key, and
+        only for those, so it is the snapshot, returned as is.
+        Args:
+            changes: dictionary given the record of each key encoded or
+                deleted (None) since the last snapshot, if any
+        """
+        if self.__mapped:
+            self.__unmap()
+            self.__mapped.close()
+            self.__mapped = None
+        cache = self.__cache
+        encode = self.__format.encode
+        for key, obj in self.__pending.items():
+            if obj is not None and key not in cache:
+                if not isinstance(obj, dict):
+                    obj = obj.to_dict()
+                cache[key] = encode(obj)
+            if changes is not None:
+                changes[key] = cache.get(key)
+        self.__pending.clear()
+        size = len(self.__objects)
+        for bucket in self.__raw.values():
+            size += len(bucket)
+        if len(cache) < size:
+            buckets = [self.__objects]
+            buckets.extend(self.__raw.values())
+            for bucket in buckets:
+                for key, obj in bucket.items():
+                    if key not in cache:
+                        record = self.__record(key, obj)
+                        if changes is not None:
+                            changes[key] = record
+        return cache
+
+    def __hand_over(self):
+        """hands the records changed since the last save to the writer
+        thread, or the whole snapshot when the writer has none
+        """
+        if self.__rebase:
+            snapshot = self.__snapshot().copy()
+            with self.__handoff:
+                self.__base = snapshot
+                self.__changes = {}
+            self.__rebase = False
+        else:
+            changes = {}
+            self.__snapshot(changes)
+            with self.__handoff:
+                self.__changes.update(changes)
+        fmt = self.__format
+        self.__writer.submit(lambda: self.__write_changes(fmt))
+
+    def __write_changes(self, fmt):
+        """applies the changes handed over since the last write to the
+        records of the writer thread, then writes them, forced to disk
+        unless HBNB_FSYNC is "never"
+        Args:
+            fmt: format the records are encoded in
+        """
+        with self.__handoff:
+            base, self.__base = self.__base, None
+            changes, self.__changes = self.__changes, {}
+        if base is not None:
+            self.__written = base
+        written = self.__written
+        for key, record in changes.items():
+            if record is None:
+                written.pop(key, None)
+            else:
+                written[key] = record
+        self.__write(written.items(), fmt, self.__fsync != "never")
+
+    def __reset_hand_over(self):
+        """starts the hand-over to the writer thread afresh, in a new
+        storage or in a forked child process, whose writer has no record
+        """
+        self.__handoff = threading.Lock()
+        self.__base = None
+        self.__changes = {}
+        self.__written = {}
+        self.__rebase = True
+
+    def __write(self, records, fmt, sync):
+        """write a snapshot to a temporary file renamed over the file
+        path, then drop the log it includes
+        Args:
+            records: (key, encoded record) pairs
+            fmt: format the records are encoded in
+            sync: force the snapshot to disk
+        """
+        tmp_path = self.__file_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            fmt.dump(records, f)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.__file_path)
+        self.__stamp = self.__stat(os.stat(self.__file_path))
+        if sync:
+            self.__sync_dir()
+        self.__drop_log()
+
+    def __sync_dir(self):
+        """force the entries of the directory of the file path to disk,
+        so a rename survives a crash
+        """
+        fd = os.open(os.path.dirname(os.path.abspath(self.__file_path)),
+                     os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __append(self):
+        """append the pending records to the log, one JSON
+        record per line
+        """
+        if not self.__pending:
+            return
+        lines = []
+        for key, value in self.__pending.items():
+            if value is None:
+                line = '{{"key": {}}}\n'.format(json.dumps(key))
+            else:
+                if self.__format.name == "json":
+                    text = self.__record(key, value)
+                else:
+                    if not isinstance(value, dict):
+                        value = value.to_dict()
+                    text = json.dumps(value)
+                line = '{{"key": {}, "value": {}}}\n'.format(
+                    json.dumps(key), text)
+            lines.append(line)
+        with open(self.__file_path + ".log", 'a+b') as f:
+            start = self.__line_end(f)
+            f.write("".join(lines).encode("UTF-8"))
+            if start == self.__log_offset:
+                self.__log_offset = f.tell()
+            if self.__fsync == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        self.__log_size += len(lines)
+        self.__pending.clear()
+
+    @staticmethod
+    def __line_end(f):
+        """returns the end of the last complete line of the log,
+        truncating the torn line a crash left after it, so the records
+        appended next start on a line of their own
+        Args:
+            f: log open for reading and appending
+        """
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos:
+            size = min(pos, 1 << 16)
+            f.seek(pos - size)
+            i = f.read(size).rfind(b"\n")
+            if i >= 0:
+                pos = pos - size + i + 1
+                break
+            pos -= size
+        if pos < end:
+            f.truncate(pos)
+        return pos
+
+    def __replay(self, offset=0):
+        """apply the records of the log on top of the snapshot
+        A torn last line, left by a crash or still being appended, is
+        ignored; a complete line that isn't a record, such as a torn
+        line a record was appended to, is skipped.
+        Args:
+            offset: bytes of the log already replayed
+        """
+        if not offset:
+            self.__log_size = 0
+        names = set()
+        try:
+            with open(self.__file_path + ".log", 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    offset += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.__log_size += 1
+                    key, value = record["key"], record.get("value")
+                    if key in self.__pending:
+                        # a change not saved yet is kept over the log
+                        continue
+                    names.add(key.partition(".")[0])
+                    if value is None:
+                        self.delete(self.__fetch(key))
+                        self.__pending.pop(key, None)
+                    else:
+                        self.__load(key, value)
+        except FileNotFoundError:
+            offset = 0
+        self.__log_offset = offset
+        self.__bump(*names)
+
+    def __drop_log(self):
+        """remove the log once the snapshot holds all its records"""
+        self.__log_size = 0
+        self.__log_offset = 0
+        try:
+            os.remove(self.__file_path + ".log")
+        except FileNotFoundError:
+            pass
+
+    def __index(self, key, obj):
+        """files obj under the foreign keys it holds, moving it when
+        one of them changed since it was last indexed
+        Args:
+            key: key of obj in __objects
+            obj: given object, or its raw record
+        """
+        raw = isinstance(obj, dict)
+        name = obj["__class__"] if raw else type(obj).__name__
+        if self.__sorted:
+            self.__sort(key, name, obj)
+        attrs = self.__ref_attrs.get(name)
+        if not attrs:
+            return
+        if raw:
+            values = tuple([obj.get(attr, "") for attr in attrs])
+        else:
+            values = tuple([getattr(obj, attr, None) for attr in attrs])
+        lists = self.__ref_lists.get(name)
+        if lists:
+            # copied, as a list can change in place
+            lists = lists.values()
+            values = tuple([tuple(value or ()) if attr in lists else value
+                            for attr, value in zip(attrs, values)])
+        old = self.__ref_values.get(key)
+        if old == values:
+            return
+        if old is not None:
+            self.__unindex(key, name)
+        for attr, value in zip(attrs, values):
+            index = self.__refs.setdefault((name, attr), {})
+            for ref in value if isinstance(value, tuple) else (value,):
+                keys = index.get(ref)
+                if keys is None:
+                    index[ref] = {key: None}
+                else:
+                    keys[key] = None
+        self.__ref_values[key] = values
+
+    def __unindex(self, key, name):
+        """removes a key from the reverse indexes
+        Args:
+            key: key of the object in __objects
+            name: class name of the object
+        """
+        values = self.__ref_values.pop(key, None)
+        if values is None:
+            return
+        for attr, value in zip(self.__ref_attrs[name], values):
+            index = self.__refs[(name, attr)]
+            for ref in value if isinstance(value, tuple) else (value,):
+                keys = index.get(ref)
+                if keys is not None:
+                    keys.pop(key, None)
+                    if not keys:
+                        del index[ref]
+
+    def __page(self, cls, order_by, limit, offset):
+        """returns a page of the objects of a class in order, from the
+        sorted indexes of the classes matching cls
+        Args:
+            cls: class to filter on
+            order_by: attribute, with a leading "-" for descending order
+            limit: maximum number of objects, or None
+            offset: number of objects to skip
+        """
+        if not cls:
+            raise ValueError("order_by, limit and offset need a class")
+        attr = order_by.lstrip("-")
+        reverse = order_by.startswith("-")
+        lists = [self.__sorted_index(name, attr)
+                 for name, kind in self.__clsdict.items()
+                 if issubclass(kind, cls)]
+        stop = None if limit is None else offset + limit
+        if len(lists) == 1 and not reverse:
+            entries = lists[0][offset:stop]
+        elif len(lists) == 1:
+            size = len(lists[0])
+            start = 0 if stop is None else max(size - stop, 0)
+            entries = lists[0][start:max(size - offset, 0)][::-1]
+        else:
+            if reverse:
+                lists = [reversed(entries) for entries in lists]
+            entries = islice(heapq.merge(*lists, reverse=reverse),
+                             offset, stop)
+        return {entry[2]: self.__fetch(entry[2]) for entry in entries}
+
+    def __matches(self, query):
+        """yields the key and the object (or raw record) of the objects
+        a query selects, in order
+        Args:
+            query: Query of this storage
+        """
+        name = query.cls.__name__
+        if self.__mapped:
+            self.__unmap(name + ".")
+        raw = self.__raw.get(name, {})
+        skip = query.skip
+        size = query.size
+        if size is not None and size <= 0:
+            return
+        for key in self.__candidates(query, name):
+            obj = self.__objects.get(key)
+            if obj is None:
+                obj = raw.get(key)
+                if obj is None:
+                    continue
+                obj = self.__raw_record(obj)
+            if not query.match(lambda attr: self.__value(obj, attr)):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            yield key, obj
+            if size is not None:
+                size -= 1
+                if not size:
+                    return
+
+    def __candidates(self, query, name):
+        """returns the keys a query has to test, in its order: the keys
+        under the foreign keys or id lists it tests, intersected from
+        the smallest set up, or the keys of the sorted index of the
+        attribute it sorts on or tests a range of, or else every key of
+        the class
+        Args:
+            query: Query of this storage
+            name: class name of the objects
+        """
+        sets = []
+        refs = self.__ref_attrs.get(name, ())
+        lists = self.__ref_lists.get(name, {})
+        for attr, op, value in query.conditions:
+            if op == "has" and attr in lists:
+                values = [value]
+                attr = lists[attr]
+            elif op in ("eq", "in") and attr in refs:
+                values = [value] if op == "eq" else list(value)
+            else:
+                continue
+            if None in values:
+                continue
+            index = self.__refs.get((name, attr), {})
+            if len(values) == 1:
+                sets.append(index.get(values[0], {}))
+            else:
+                sets.append({key: None for value in values
+                             for key in index.get(value, ())})
+        keys = None
+        if sets:
+            sets.sort(key=len)
+            keys = list(sets[0])
+            for other in sets[1:]:
+                if not keys:
+                    break
+                keys = [key for key in keys if key in other]
+        if keys is None:
+            attr = (query.ordering or "").lstrip("-")
+            if not attr:
+                for cond in query.conditions:
+                    if (name, cond[0]) in self.__sorted and cond[1] in (
+                            "eq", "lt", "le", "gt", "ge", "startswith"):
+                        attr = cond[0]
+                        break
+            if attr:
+                return self.__walk(query, name, attr)
+            keys = list(self.__by_class.get(query.cls, ()))
+            keys.extend(self.__raw.get(name, ()))
+            return keys
+        if query.ordering:
+            attr = query.ordering.lstrip("-")
+            values = {}
+            for key in keys:
+                obj = self.__objects.get(key)
+                if obj is None:
+                    obj = self.__raw.get(name, {}).get(key)
+                    if obj is not None:
+                        obj = self.__raw_record(obj)
+                values[key] = None if obj is None else self.__value(obj, attr)
+            keys.sort(key=lambda key: (values[key] is not None,
+                                       values[key], key),
+                      reverse=query.ordering.startswith("-"))
+        return keys
+
+    def __walk(self, query, name, attr, chunk=256):
+        """yields the keys of the sorted index of attr in the order of
+        the query, only between the bounds its conditions on attr set
+        The index is read chunk entries at a time, each chunk starting
+        after the last entry yielded, so objects can be added, changed
+        or deleted meanwhile.
+        Args:
+            query: Query of this storage
+            name: class name of the objects
+            attr: attribute of the sorted index
+            chunk: number of entries read at a time
+        """
+        entries = self.__sorted_index(name, attr)
+        reverse = (query.ordering or "").startswith("-")
+        last = None
+        while True:
+            low, high = self.__bounds(entries, query, attr)
+            if reverse:
+                if last is not None:
+                    high = min(high, bisect_left(entries, last))
+                part = entries[max(high - chunk, low):high][::-1]
+            else:
+                if last is not None:
+                    low = max(low, bisect_right(entries, last))
+                part = entries[low:min(low + chunk, high)]
+            if not part:
+                return
+            for entry in part:
+                yield entry[2]
+            last = part[-1]
+
+    @staticmethod
+    def __bounds(entries, query, attr):
+        """returns the positions in a sorted index between which the
+        conditions of a query on its attribute hold
+        Args:
+            entries: sorted index of attr
+            query: Query of this storage
+            attr: attribute of the sorted index
+        """
+        low, high = 0, len(entries)
+        top = chr(0x10ffff)
+        for cond, op, value in query.conditions:
+            if cond != attr or value is None:
+                continue
+            if op == "startswith" and not isinstance(value, str):
+                continue
+            if op in ("eq", "ge", "startswith"):
+                low = max(low, bisect_left(entries, (True, value)))
+            if op == "gt":
+                low = max(low, bisect_left(entries, (True, value, top)))
+            if op in ("eq", "le"):
+                high = min(high, bisect_left(entries, (True, value, top)))
+            if op == "lt":
+                high = min(high, bisect_left(entries, (True, value)))
+            if op == "startswith":
+                high = min(high, bisect_left(entries, (True, value + top)))
+        return low, high
+
+    def __value(self, obj, attr):
+        """returns the value of an attribute of an object or raw record
+        Args:
+            obj: given object, or its raw record
+            attr: attribute name
+        """
+        if isinstance(obj, dict):
+            lists = self.__ref_lists.get(obj["__class__"])
+            if lists:
+                attr = lists.get(attr, attr)
+            return self.__raw_value(obj, attr)
+        lists = self.__ref_lists.get(type(obj).__name__)
+        if lists:
+            attr = lists.get(attr, attr)
+        return getattr(obj, attr, None)
+
+    def __sorted_index(self, name, attr):
+        """returns the sorted index of a class on an attribute, a list
+        of (value is not None, value, key) entries, building it from the
+        objects and records of the class the first time
+        Args:
+            name: class name of the objects
+            attr: attribute to sort on
+        """
+        index = self.__sorted.get((name, attr))
+        if index is None:
+            if self.__mapped:
+                self.__unmap(name + ".")
+            values = {}
+            bucket = self.__by_class.get(self.__clsdict[name], {})
+            for key, obj in bucket.items():
+                values[key] = getattr(obj, attr, None)
+            for key, value in self.__raw.get(name, {}).items():
+                values[key] = self.__raw_value(self.__raw_record(value),
+                                               attr)
+            entries = [(value is not None, value, key)
+                       for key, value in values.items()]
+            entries.sort()
+            index = self.__sorted[(name, attr)] = (entries, values)
+        return index[0]
+
+    def __sort(self, key, name, obj):
+        """moves obj in the sorted indexes of its class when the value
+        it is sorted on changed since it was last sorted
+        Args:
+            key: key of obj in __objects
+            name: class name of obj
+            obj: given object, or its raw record
+        """
+        raw = isinstance(obj, dict)
+        for (kind, attr), (entries, values) in self.__sorted.items():
+            if kind != name:
+                continue
+            if raw:
+                value = self.__raw_value(obj, attr)
+            else:
+                value = getattr(obj, attr, None)
+            if key in values:
+                old = values[key]
+                if old == value:
+                    continue
+                entries.pop(bisect_left(entries, (old is not None, old, key)))
+            insort(entries, (value is not None, value, key))
+            values[key] = value
+
+    def __unsort(self, key, name):
+        """removes a key from the sorted indexes of its class
+        Args:
+            key: key of the object in __objects
+            name: class name of the object
+        """
+        for (kind, attr), (entries, values) in self.__sorted.items():
+            if kind == name and key in values:
+                old = values.pop(key)
+                entries.pop(bisect_left(entries, (old is not None, old, key)))
+
+    @classmethod
+    def __raw_value(cls, value, attr):
+        """returns the value of an attribute of a raw record as the
+        object built from it holds it
+        Args:
+            value: dictionary of the record
+            attr: attribute name
+        """
+        kind = cls.__clsdict[value["__class__"]]
+        value = value.get(attr, getattr(kind, attr, None))
+        if attr in serializers.TIMESTAMPS and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return value
 
     def close(self):
-        """deserializing the JSON file to objects
+        """refresh the objects from the file if it changed since it was
+        last read or written: a new snapshot is read again, otherwise
+        only the records appended to the log since are replayed
+        """
+        try:
+            stamp = self.__stat(os.stat(self.__file_path))
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self.__stamp:
+            self.reload()
+            return
+        try:
+            size = os.stat(self.__file_path + ".log").st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self.__log_offset:
+            self.reload()
+        elif size > self.__log_offset:
+            self.__replay(self.__log_offset)
+
+    @staticmethod
+    def __stat(result):
+        """returns what tells two versions of a file apart
+        Args:
+            result: os.stat_result of the file
         """
-        self.reload()
+        return result.st_ino, result.st_size, result.st_mtime_ns
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Streaming reader and writer for the file.json format: one JSON
+object mapping each key to the dictionary of an instance
+
+Neither side holds the whole document: the reader decodes one record
+at a time from a sliding buffer and the writer writes records as they
+come.
+"""
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+_OPEN = re.compile(r"[ \t\n\r]*\{[ \t\n\r]*")
+_SPACE = re.compile(r"[ \t\n\r]*")
+_NEXT = re.compile(r"[ \t\n\r]*([,}])[ \t\n\r]*")
+_COLON = re.compile(r"[ \t\n\r]*:[ \t\n\r]*")
+_scan = json.JSONDecoder().scan_once
+# what json.dumps does to a str, without its per call set up
+_quote = json.encoder.encode_basestring_ascii
+
+
+def dump(records, f):
+    """writes records to a file as one JSON object
+    Args:
+        records: iterable of (key, JSON text of the value) pairs
+        f: text file open for writing
+    """
+    f.write("{")
+    sep = ""
+    for key, text in records:
+        f.write(sep + _quote(key) + ": " + text)
+        sep = ", "
+    f.write("}")
+
+
+def load(f, chunk_size=CHUNK_SIZE, text=False):
+    """reads a JSON object from a file one member at a time
+    Args:
+        f: text file open for reading
+        chunk_size: number of characters read at once
+        text: also yield the JSON text of each value
+    Return:
+        yields (key, value) pairs, or (key, value, JSON text) triples
+    Exceptions:
+        ValueError: when the file doesn't hold a JSON object
+    """
+    buf = ""
+    eof = False
+    while not eof and not buf.strip():
+        more = f.read(chunk_size)
+        eof = not more
+        buf += more
+    match = _OPEN.match(buf)
+    if match is None:
+        raise json.JSONDecodeError("Expecting '{'", buf, 0)
+    pos = match.end()
+    first = True
+    while True:
+        try:
+            if first:
+                i = _SPACE.match(buf, pos).end()
+                if buf.startswith("}", i):
+                    return
+            else:
+                match = _NEXT.match(buf, pos)
+                if match is None:
+                    raise json.JSONDecodeError("Expecting ','", buf, pos)
+                if match.group(1) == "}":
+                    return
+                i = match.end()
+            key, i = _scan(buf, i)
+            match = _COLON.match(buf, i)
+            if match is None:
+                raise json.JSONDecodeError("Expecting ':'", buf, i)
+            start = match.end()
+            value, i = _scan(buf, start)
+            if i == len(buf) and not eof:
+                raise json.JSONDecodeError("Truncated value", buf, i)
+        except (StopIteration, ValueError):
+            if eof:
+                raise json.JSONDecodeError("Invalid record", buf, pos)
+            # the record runs past the buffer, read on and retry it
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+            continue
+        if text:
+            yield key, value, buf[start:i]
+        else:
+            yield key, value
+        pos, first = i, False
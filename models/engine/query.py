@@ -0,0 +1,155 @@
+#!/usr/bin/python3
+"""Queries on the objects of one class of a storage
+
+    storage.query(Place).filter(city_id=city.id, price_by_night__lt=100)
+        .order_by("name").limit(10).all()
+
+A keyword of filter is an attribute name, optionally followed by "__"
+and one of the OPERATORS; a plain name tests equality, "has" tests that
+a relationship holds the object of an id, e.g. amenities__has=id. As
+keywords cannot repeat, chain filter to test two values of one
+attribute. The storage runs
+the query: DBStorage compiles it to SQL, FileStorage answers it from its
+indexes when it can.
+"""
+import operator
+from copy import copy
+
+OPERATORS = ("eq", "ne", "lt", "le", "gt", "ge", "in", "startswith",
+             "has")
+
+
+class Query:
+    """Selection of objects of exactly one class, built by chaining
+    filter, order_by, limit and offset, each returning a new query
+    Attributes:
+        cls: class of the objects
+        conditions: list of (attribute, operator, value) the objects
+            all match
+        ordering: attribute to sort on, with a leading "-" for
+            descending order, or None
+        skip: number of objects to skip
+        size: maximum number of objects, or None
+        columns: attributes to return instead of the objects, or None
+    """
+
+    def __init__(self, storage, cls):
+        """creates the query of every object of cls
+        Args:
+            storage: storage running the query
+            cls: class of the objects
+        """
+        self.__storage = storage
+        self.cls = cls
+        self.conditions = []
+        self.ordering = None
+        self.skip = 0
+        self.size = None
+        self.columns = None
+
+    def filter(self, **conditions):
+        """returns the query narrowed to the objects matching conditions
+        Args:
+            conditions: attribute[__operator]=value pairs
+        Exceptions:
+            ValueError: when the operator doesn't exist
+        """
+        query = copy(self)
+        query.conditions = list(self.conditions)
+        for name, value in conditions.items():
+            attr, sep, op = name.rpartition("__")
+            if not sep:
+                attr, op = name, "eq"
+            elif op not in OPERATORS:
+                raise ValueError("Unknown operator: {}".format(op))
+            query.conditions.append((attr, op, value))
+        return query
+
+    def order_by(self, attr):
+        """returns the query sorted on an attribute, ties by id
+        Args:
+            attr: attribute name, with a leading "-" for descending order
+        """
+        query = copy(self)
+        query.ordering = attr
+        return query
+
+    def limit(self, size):
+        """returns the query of at most size objects
+        Args:
+            size: maximum number of objects
+        """
+        query = copy(self)
+        query.size = size
+        return query
+
+    def offset(self, skip):
+        """returns the query skipping the first objects
+        Args:
+            skip: number of objects to skip
+        """
+        query = copy(self)
+        query.skip = skip
+        return query
+
+    def all(self):
+        """returns the list of the objects"""
+        return list(self)
+
+    def first(self):
+        """returns the first object, or None"""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """returns the number of objects, without building them"""
+        return self.__storage.count(self)
+
+    def values(self, *attrs):
+        """returns the tuples of the given attributes of the objects,
+        without building them
+        Args:
+            attrs: attribute names
+        """
+        query = copy(self)
+        query.columns = attrs
+        return list(self.__storage.select(query))
+
+    def __iter__(self):
+        """returns an iterator over the objects"""
+        return iter(self.__storage.select(self))
+
+    def match(self, get):
+        """tells whether an object matches every condition
+        Args:
+            get: function returning the value of an attribute of the
+                object
+        """
+        for attr, op, value in self.conditions:
+            if not compare(op, get(attr), value):
+                return False
+        return True
+
+
+def compare(op, left, right):
+    """applies an operator the way SQL does: None is only equal to
+    None, and matches no other operator
+    Args:
+        op: one of the OPERATORS
+        left: value of the object
+        right: value of the condition
+    """
+    if op == "eq":
+        return left == right
+    if op == "ne" and right is None:
+        return left is not None
+    if left is None or right is None:
+        return False
+    if op == "ne":
+        return left != right
+    if op == "in":
+        return left in right
+    if op == "has":
+        return right in left
+    if op == "startswith":
+        return isinstance(left, str) and left.startswith(right)
+    return getattr(operator, op)(left, right)
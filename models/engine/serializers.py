@@ -0,0 +1,469 @@
+#!/usr/bin/python3
+"""Snapshot formats of FileStorage
+
+A format turns the dictionary of an instance into a record (encode),
+writes records to a binary file (dump) and reads them back as
+(key, dictionary) pairs (load), or with the records themselves, which
+it can write again as they are (records) and decode later (decode).
+The reader of a file is picked from its first bytes, so files written
+as JSON keep loading whatever format is used to write.
+"""
+import io
+import json
+import mmap
+import struct
+from datetime import datetime, timedelta
+from models.engine import json_stream
+
+MAGIC = b"HBNBPACK"
+VERSION = 2
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+TIMESTAMPS = ("created_at", "updated_at")
+
+# field tags, and the struct code of the ones with a packed value
+STR, INT, FLOAT, TRUE, FALSE, NONE, STAMP, JSON = range(8)
+CODES = {STR: "I", INT: "q", FLOAT: "d", STAMP: "q", JSON: "I"}
+
+
+def _default(obj):
+    """encodes the datetimes left in records read from a packed file
+    """
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError("{} is not JSON serializable".format(type(obj)))
+
+
+# json.dumps builds a new encoder whenever it is given default=
+_encode = json.JSONEncoder(default=_default).encode
+
+
+class JSONFormat:
+    """The file.json format: one JSON object of key to dictionary"""
+    name = "json"
+
+    def encode(self, value):
+        """returns the JSON text of a dictionary
+        Args:
+            value: dictionary of an instance
+        """
+        return _encode(value)
+
+    def decode(self, record):
+        """returns the dictionary of a record
+        Args:
+            record: JSON text returned by encode or records
+        """
+        return json.loads(record)
+
+    def dump(self, records, f):
+        """writes records to a binary file
+        Args:
+            records: iterable of (key, encoded record) pairs
+            f: binary file open for writing
+        """
+        text = io.TextIOWrapper(f, encoding="UTF-8")
+        json_stream.dump(records, text)
+        text.flush()
+        text.detach()
+
+    def load(self, f):
+        """reads records from a binary file
+        Args:
+            f: binary file open for reading
+        Return:
+            yields (key, dictionary) pairs
+        """
+        text = io.TextIOWrapper(f, encoding="UTF-8")
+        try:
+            yield from json_stream.load(text)
+        finally:
+            text.detach()
+
+    def records(self, f):
+        """reads records from a binary file, with their JSON text
+        Args:
+            f: binary file open for reading
+        Return:
+            yields (key, dictionary, encoded record) triples
+        """
+        text = io.TextIOWrapper(f, encoding="UTF-8")
+        try:
+            yield from json_stream.load(text, text=True)
+        finally:
+            text.detach()
+
+
+class PackFormat:
+    """A compact binary format
+
+    Records of the same class with the same fields of the same types
+    share a shape: the class name, field names and field tags are
+    stored once, in the shape table at the end of the file. A record
+    only holds its shape number, its numbers and timestamps packed in
+    one struct (timestamps as microseconds since the epoch) and the
+    bytes of its strings.
+
+    The index follows the shape table: one fixed-width entry per
+    record, sorted by key, holding the key padded with NUL bytes and
+    the offset of the record (see PackFile). The header holds the
+    offsets of the shape table and of the index, the number of records
+    and the width of the index keys.
+    """
+    name = "pack"
+    header = struct.Struct("<8sHQQQH")
+    length = struct.Struct("<I")
+    offset = struct.Struct("<Q")
+
+    def __init__(self):
+        """starts an empty shape table"""
+        self.__shapes = []
+        self.__numbers = {}
+        self.__decoders = []
+
+    def encode(self, value):
+        """returns the packed record of a dictionary
+        Args:
+            value: dictionary of an instance
+        """
+        shape = [value["__class__"]]
+        items = []
+        blobs = []
+        for name, item in value.items():
+            kind = type(item)
+            if name == "__class__":
+                continue
+            elif name in TIMESTAMPS and kind in (str, datetime):
+                if kind is str:
+                    item = datetime.fromisoformat(item)
+                shape.append((name, STAMP))
+                items.append((item - EPOCH) // MICROSECOND)
+            elif kind is str:
+                blobs.append(item.encode("UTF-8"))
+                shape.append((name, STR))
+                items.append(len(blobs[-1]))
+            elif kind is int and -1 << 63 <= item < 1 << 63:
+                shape.append((name, INT))
+                items.append(item)
+            elif kind is float:
+                shape.append((name, FLOAT))
+                items.append(item)
+            elif kind is bool:
+                shape.append((name, TRUE if item else FALSE))
+            elif item is None:
+                shape.append((name, NONE))
+            else:
+                blobs.append(_encode(item).encode())
+                shape.append((name, JSON))
+                items.append(len(blobs[-1]))
+        shape = tuple(shape)
+        found = self.__numbers.get(shape)
+        if found is None:
+            found = self.__numbers[shape] = (
+                len(self.__shapes), _struct("<IH", shape[1:]))
+            self.__shapes.append(shape)
+        number, packer = found
+        data = b"".join(blobs)
+        return packer.pack(packer.size - 4 + len(data), number,
+                           *items) + data
+
+    def decode(self, record):
+        """returns the dictionary of a record, with datetimes for the
+        timestamps
+        Args:
+            record: packed record returned by encode or records
+        """
+        for shape in self.__shapes[len(self.__decoders):]:
+            self.__decoders.append(
+                (_struct("<H", shape[1:]), shape[0], shape[1:]))
+        return _decode(record[self.length.size:], self.__decoders)
+
+    def dump(self, records, f):
+        """writes records to a binary file
+        Args:
+            records: iterable of (key, encoded record) pairs
+            f: binary file open for writing
+        """
+        f.write(self.header.pack(MAGIC, VERSION, 0, 0, 0, 0))
+        entries = []
+        table = self.header.size
+        for key, record in records:
+            f.write(record)
+            entries.append((key.encode("UTF-8"), table))
+            table += len(record)
+        shapes = json.dumps(self.__shapes).encode("UTF-8")
+        f.write(self.length.pack(len(shapes)) + shapes)
+        index = table + self.length.size + len(shapes)
+        width = max((len(key) for key, offset in entries), default=0)
+        entries.sort()
+        f.write(b"".join(key.ljust(width, b"\0") + self.offset.pack(offset)
+                         for key, offset in entries))
+        f.seek(0)
+        f.write(self.header.pack(MAGIC, VERSION, table, len(entries),
+                                 index, width))
+        f.seek(0, io.SEEK_END)
+
+    def load(self, f):
+        """reads records from a binary file
+        Args:
+            f: binary file open for reading
+        Return:
+            yields (key, dictionary) pairs, with datetimes for the
+            timestamps
+        Exceptions:
+            ValueError: when the file is truncated or not in this format
+        """
+        table, count = self.read_header(f.read(self.header.size))[:2]
+        f.seek(table)
+        shapes = _shapes(self.__read(f))
+        f.seek(self.header.size)
+        for i in range(count):
+            value = _decode(self.__read(f), shapes)
+            yield "{}.{}".format(value["__class__"], value["id"]), value
+
+    def records(self, f):
+        """reads records from a binary file, with their packed bytes
+        The shape table of the file replaces the one of the format, so
+        the records read are what encode returns for their dictionary.
+        Args:
+            f: binary file open for reading
+        Return:
+            yields (key, dictionary, encoded record) triples
+        Exceptions:
+            ValueError: when the file is truncated or not in this format
+        """
+        table, count = self.read_header(f.read(self.header.size))[:2]
+        f.seek(table)
+        table = self.__read(f)
+        shapes = _shapes(table)
+        self.__shapes = [tuple([shape[0]] + [tuple(field)
+                                             for field in shape[1:]])
+                         for shape in json.loads(table)]
+        self.__numbers = {shape: (i, _struct("<IH", shape[1:]))
+                          for i, shape in enumerate(self.__shapes)}
+        self.__decoders = []
+        f.seek(self.header.size)
+        for i in range(count):
+            data = self.__read(f)
+            value = _decode(data, shapes)
+            yield ("{}.{}".format(value["__class__"], value["id"]), value,
+                   self.length.pack(len(data)) + data)
+
+    @classmethod
+    def read_header(cls, head):
+        """returns the offset of the shape table, the number of records,
+        the offset of the index and the width of its keys
+        Args:
+            head: first bytes of a file
+        Exceptions:
+            ValueError: when the file is truncated or not in this format
+        """
+        if len(head) < cls.header.size:
+            raise ValueError("Truncated header")
+        magic, version, *fields = cls.header.unpack_from(head)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unknown format")
+        return fields
+
+    def __read(self, f):
+        """returns the next length-prefixed block of a file
+        Args:
+            f: binary file open for reading
+        Exceptions:
+            ValueError: when the file ends inside the block
+        """
+        head = f.read(self.length.size)
+        if len(head) < self.length.size:
+            raise ValueError("Truncated file")
+        size = self.length.unpack(head)[0]
+        data = f.read(size)
+        if len(data) < size:
+            raise ValueError("Truncated file")
+        return data
+
+
+class PackFile:
+    """A packed file mapped in memory, whose records are read one at
+    a time through the index
+
+    A record is returned once: pop and items skip the keys already
+    taken, so records moved into memory are never read again.
+    """
+
+    def __init__(self, f):
+        """maps a packed file and reads its shape table
+        Args:
+            f: binary file open for reading, at its start
+        Exceptions:
+            ValueError: when the file is truncated or not in this format
+        """
+        self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        table, self.__count, self.__index, self.__width = \
+            PackFormat.read_header(self.__map)
+        self.__entry = self.__width + PackFormat.offset.size
+        if self.__index + self.__count * self.__entry > len(self.__map):
+            self.close()
+            raise ValueError("Truncated index")
+        self.__shapes = _shapes(self.__block(table))
+        self.__taken = set()
+
+    def pop(self, key):
+        """returns the dictionary of a record and takes it
+        Args:
+            key: key of the record
+        Return:
+            returns the dictionary, or None if there is no such record
+            or it was already taken
+        """
+        if key in self.__taken:
+            return None
+        padded = key.encode("UTF-8").ljust(self.__width, b"\0")
+        i = self.__search(padded)
+        if i == self.__count or self.__key(i) != padded:
+            return None
+        self.__taken.add(key)
+        return self.__record(i)
+
+    def discard(self, key):
+        """takes a record without reading it
+        Args:
+            key: key of the record
+        """
+        self.__taken.add(key)
+
+    def items(self, prefix=""):
+        """takes the records whose key starts with prefix
+        Args:
+            prefix: start of the keys, e.g. "Place."
+        Return:
+            yields (key, dictionary) pairs in key order
+        """
+        start = prefix.encode("UTF-8")
+        if len(start) > self.__width:
+            return
+        if start:
+            end = self.__search(start[:-1] + bytes([start[-1] + 1]))
+        else:
+            end = self.__count
+        for i in range(self.__search(start), end):
+            key = self.__key(i).rstrip(b"\0").decode("UTF-8")
+            if key not in self.__taken:
+                self.__taken.add(key)
+                yield key, self.__record(i)
+
+    def close(self):
+        """unmaps the file"""
+        self.__map.close()
+
+    def __key(self, i):
+        """returns the padded key of an index entry
+        Args:
+            i: number of the entry
+        """
+        start = self.__index + i * self.__entry
+        return self.__map[start:start + self.__width]
+
+    def __search(self, key):
+        """returns the number of the first index entry whose key is not
+        lower than key
+        Args:
+            key: key, padded or shorter than the index keys
+        """
+        low, high = 0, self.__count
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __record(self, i):
+        """returns the dictionary of the record of an index entry
+        Args:
+            i: number of the entry
+        """
+        start = self.__index + i * self.__entry + self.__width
+        offset = PackFormat.offset.unpack_from(self.__map, start)[0]
+        return _decode(self.__block(offset), self.__shapes)
+
+    def __block(self, offset):
+        """returns the length-prefixed block at an offset
+        Args:
+            offset: position of the length of the block
+        Exceptions:
+            ValueError: when the file ends inside the block
+        """
+        size = PackFormat.length.unpack_from(self.__map, offset)[0]
+        start = offset + PackFormat.length.size
+        if start + size > len(self.__map):
+            raise ValueError("Truncated file")
+        return self.__map[start:start + size]
+
+
+def _struct(prefix, fields):
+    """returns the struct of the packed values of a shape
+    Args:
+        prefix: struct codes of the record header
+        fields: (name, tag) pairs of the shape
+    """
+    return struct.Struct(prefix + "".join(
+        CODES[tag] for name, tag in fields if tag in CODES))
+
+
+def _shapes(table):
+    """returns the (struct, class name, fields) of each shape of a
+    shape table
+    Args:
+        table: JSON text of the shape table
+    """
+    shapes = []
+    for shape in json.loads(table):
+        fields = [tuple(field) for field in shape[1:]]
+        shapes.append((_struct("<H", fields), shape[0], fields))
+    return shapes
+
+
+def _decode(data, shapes):
+    """returns the dictionary of a packed record
+    Args:
+        data: record without its length
+        shapes: (struct, class name, fields) of each shape
+    """
+    unpacker, cls, fields = shapes[int.from_bytes(data[:2], "little")]
+    items = unpacker.unpack_from(data)
+    pos = unpacker.size
+    i = 1
+    value = {}
+    for name, tag in fields:
+        if tag == STR or tag == JSON:
+            end = pos + items[i]
+            item = str(data[pos:end], "UTF-8")
+            if tag == JSON:
+                item = json.loads(item)
+            pos = end
+            i += 1
+        elif tag == STAMP:
+            item = EPOCH + timedelta(microseconds=items[i])
+            i += 1
+        elif tag == INT or tag == FLOAT:
+            item = items[i]
+            i += 1
+        else:
+            item = None if tag == NONE else tag == TRUE
+        value[name] = item
+    value["__class__"] = cls
+    return value
+
+
+formats = {"json": JSONFormat, "pack": PackFormat}
+
+
+def detect(f):
+    """returns the format a file was written in, from its first bytes
+    Args:
+        f: binary file open for reading, at its start
+    """
+    magic = f.read(len(MAGIC))
+    f.seek(0)
+    return PackFormat() if magic == MAGIC else JSONFormat()
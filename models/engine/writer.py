@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Background writer of FileStorage
+
+A single thread runs the jobs it is given. Jobs submitted while one is
+waiting replace it, so a burst of saves ends in one write of the latest
+snapshot. A forked child process gets a thread of its own, without the
+jobs of its parent.
+"""
+import atexit
+import os
+import threading
+
+
+class Writer:
+    """Runs the latest submitted job in a background thread
+    Attributes:
+        __delay: seconds a job waits for a newer one before it runs
+        __job: job waiting to run, or None
+        __busy: a job is waiting for its delay or running
+        __hurry: number of callers of flush, which cut the delay
+        __error: exception raised by the last job that failed
+    """
+
+    def __init__(self, delay=0):
+        """starts the thread
+        Args:
+            delay: seconds a job waits for a newer one before it runs
+        """
+        self.__delay = delay
+        self.__start()
+        os.register_at_fork(after_in_child=self.__start)
+        atexit.register(self.flush)
+
+    def submit(self, job):
+        """queues a job in place of the one waiting, if any
+        Args:
+            job: callable taking no argument
+        """
+        with self.__cond:
+            self.__job = job
+            self.__cond.notify_all()
+
+    def flush(self):
+        """waits until every submitted job ran
+        Exceptions:
+            re-raises the exception of the last job that failed
+        """
+        with self.__cond:
+            self.__hurry += 1
+            self.__cond.notify_all()
+            try:
+                self.__cond.wait_for(
+                    lambda: self.__job is None and not self.__busy)
+            finally:
+                self.__hurry -= 1
+            error, self.__error = self.__error, None
+        if error is not None:
+            raise error
+
+    def __start(self):
+        """starts the thread with no job"""
+        self.__job = None
+        self.__busy = False
+        self.__hurry = 0
+        self.__error = None
+        self.__cond = threading.Condition()
+        thread = threading.Thread(target=self.__run, name="hbnb-writer",
+                                  daemon=True)
+        thread.start()
+
+    def __run(self):
+        """runs the jobs as they are submitted"""
+        while True:
+            with self.__cond:
+                self.__cond.wait_for(lambda: self.__job is not None)
+                self.__busy = True
+                self.__cond.wait_for(lambda: self.__hurry, self.__delay)
+                job, self.__job = self.__job, None
+            error = None
+            try:
+                job()
+            except Exception as e:
+                error = e
+            with self.__cond:
+                self.__busy = False
+                if error is not None:
+                    self.__error = error
+                self.__cond.notify_all()
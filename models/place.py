@@ -7,6 +7,7 @@ from models.base_model import BaseModel, Base
 from models.review import Review
 from models.amenity import Amenity
 from sqlalchemy import Column, Table, String, Integer, Float, ForeignKey
+from sqlalchemy import Index
 from sqlalchemy.orm import relationship
 
 if getenv("HBNB_TYPE_STORAGE") == "db":
@@ -16,7 +17,7 @@ if getenv("HBNB_TYPE_STORAGE") == "db":
                                  primary_key=True),
                           Column("amenity_id", String(60),
                                  ForeignKey("amenities.id"),
-                                 primary_key=True))
+                                 primary_key=True, index=True))
 
 
 class Place(BaseModel, Base):
@@ -25,8 +26,10 @@ class Place(BaseModel, Base):
     __tablename__ = "places"
 
     if getenv("HBNB_TYPE_STORAGE") == "db":
+        __table_args__ = (Index("ix_places_city_id_name", "city_id", "name"),)
         city_id = Column(String(60), ForeignKey("cities.id"), nullable=False)
-        user_id = Column(String(60), ForeignKey("users.id"), nullable=False)
+        user_id = Column(String(60), ForeignKey("users.id"), nullable=False,
+                         index=True)
         name = Column(String(128), nullable=False)
         description = Column(String(1024))
         number_rooms = Column(Integer, nullable=False, default=0)
@@ -58,26 +61,23 @@ class Place(BaseModel, Base):
         def reviews(self):
             """ Returns the list of Review instances with
             place_id equals to the current Place.id """
-            reviews = models.storage.all(Review)
-            lst = []
-            for review in reviews.values():
-                if review.place_id == self.id:
-                    lst.append(review)
-            return lst
+            return models.storage.query(Review).filter(
+                place_id=self.id).all()
 
         @property
         def amenities(self):
             """Amenities getter"""
-            amenities = models.storage.all(Amenity)
             lst = []
-            for amenity in amenities.values():
-                if amenity.id in self.amenity_ids:
+            for amenity_id in self.amenity_ids:
+                amenity = models.storage.get(Amenity, amenity_id)
+                if amenity:
                     lst.append(amenity)
             return lst
 
         @amenities.setter
         def amenities(self, obj):
             """Amenities setter"""
-            if type(obj) == Amenity:
-                self.amenity_ids.append(obj.id)
+            if type(obj) == Amenity and obj.id not in self.amenity_ids:
+                # copy so the class level default list stays empty
+                self.amenity_ids = self.amenity_ids + [obj.id]
 
@@ -1,12 +1,28 @@
 #!/usr/bin/python3
 """ State Module for HBNB project """
+from os import getenv
+import models
 from models.base_model import BaseModel, Base
-from sqlalchemy import Column, String, ForeignKey
+from models.city import City
+from sqlalchemy import Column, String
 from sqlalchemy.orm import relationship
 
+
 class State(BaseModel, Base):
     """ State class """
     __tablename__ = 'states'
-    name = Column(String(128), nullable=False)
 
-    cities = relationship('City', cascade='all, delete-orphan', backref='state')
+    if getenv("HBNB_TYPE_STORAGE") == "db":
+        name = Column(String(128), nullable=False, index=True)
+        cities = relationship('City', cascade='all, delete-orphan',
+                              backref='state', order_by='City.name')
+
+    else:
+        name = ""
+
+        @property
+        def cities(self):
+            """ Returns the list of City instances with
+            state_id equals to the current State.id, sorted by name """
+            return models.storage.lookup(City, "state_id", self.id,
+                                         order_by="name")
@@ -96,6 +96,15 @@ class TestBaseModel(unittest.TestCase):
         new_model = BaseModel(**model_dict)
         self.assertEqual(model.to_dict(), new_model.to_dict())
 
+    def test_from_dict_timestamps(self):
+        """
+        Test that timestamps without microseconds are parsed too.
+        """
+        model = BaseModel(id="1", created_at="2023-11-20T10:39:05",
+                          updated_at="2023-11-20T10:39:05.604541")
+        self.assertEqual(model.created_at, datetime(2023, 11, 20, 10, 39, 5))
+        self.assertEqual(model.updated_at.microsecond, 604541)
+
     def test_default(self):
         """
         Test the default instantiation of BaseModel.
@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+""" Module for testing db storage
+
+Run with HBNB_TYPE_STORAGE=db, e.g. against an in-memory database:
+HBNB_TYPE_STORAGE=db HBNB_DB_URL=sqlite:// python3 -m unittest discover
+"""
+import os
+import threading
+import unittest
+from os import getenv
+from unittest import mock
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") != "db", "DBStorage only")
+class test_DBStorage(unittest.TestCase):
+    """ Class to test the db storage method """
+
+    def setUp(self):
+        """ Save a state with a city """
+        self.state = State(name="California")
+        storage.new(self.state)
+        self.city = City(name="San Francisco", state_id=self.state.id)
+        storage.new(self.city)
+        storage.save()
+
+    def tearDown(self):
+        """ Remove the objects and the session """
+        storage.delete(self.city)
+        storage.delete(self.state)
+        storage.save()
+        storage.close()
+
+    def test_all(self):
+        """ all(cls) returns the objects of cls by key """
+        states = storage.all(State)
+        self.assertIs(states['State.' + self.state.id], self.state)
+        self.assertNotIn('City.' + self.city.id, states)
+        self.assertIn('City.' + self.city.id, storage.all())
+
+    def test_all_load(self):
+        """ Relationships to load come with the objects """
+        storage.close()
+        state = storage.all(State, load=["cities"])['State.' + self.state.id]
+        self.assertIn('cities', state.__dict__)
+        self.assertEqual([city.id for city in state.cities], [self.city.id])
+
+    def test_all_order_by(self):
+        """ all(cls) returns a page of objects in order """
+        other = State(name="Arizona")
+        storage.new(other)
+        storage.save()
+        page = storage.all(State, order_by="name")
+        self.assertEqual(list(page.values())[:2], [other, self.state])
+        page = storage.all(State, order_by="-name", limit=1, offset=1)
+        self.assertEqual(list(page.values()), [other])
+        with self.assertRaises(ValueError):
+            storage.all(order_by="name")
+        storage.delete(other)
+
+    def test_query(self):
+        """ A query is run by the database """
+        query = storage.query(City).filter(state_id=self.state.id)
+        self.assertEqual(query.all(), [self.city])
+        self.assertEqual(query.count(), 1)
+        self.assertEqual(query.values("name"), [("San Francisco",)])
+        self.assertEqual(storage.query("City").filter(
+            name__startswith="San", name__in=["San Francisco"]).first(),
+            self.city)
+        self.assertEqual(storage.query(State).filter(
+            name__lt="California").order_by("-name").all(), [])
+
+    def test_query_has(self):
+        """ has selects the places holding an amenity """
+        user = User(email="a@b.c", password="pwd")
+        place = Place(name="House", city_id=self.city.id, user_id=user.id)
+        wifi = Amenity(name="Wifi")
+        place.amenities.append(wifi)
+        for obj in (user, place, wifi):
+            storage.new(obj)
+        storage.save()
+        query = storage.query(Place).filter(amenities__has=wifi.id)
+        self.assertEqual(query.all(), [place])
+        self.assertEqual(query.filter(city_id__in=["x"]).count(), 0)
+        for obj in (place, wifi, user):
+            storage.delete(obj)
+        storage.save()
+
+    def test_generations(self):
+        """ Generations change once the changes of a class are committed """
+        before = storage.generations(State, City)
+        self.state.name = "Nevada"
+        storage.get(State, self.state.id)
+        self.assertEqual(storage.generations(State, City), before)
+        storage.save()
+        after = storage.generations(State, "City")
+        self.assertNotEqual(after[0], before[0])
+        self.assertEqual(after[1], before[1])
+        storage.bulk_new([State(name="Oregon")])
+        storage.save()
+        self.assertNotEqual(storage.generations(State), after[:1])
+
+    def test_state_cities_sorted(self):
+        """ State.cities is sorted by name """
+        other = City(name="Fresno", state_id=self.state.id)
+        storage.new(other)
+        storage.save()
+        storage.close()
+        state = storage.get(State, self.state.id)
+        self.assertEqual([city.name for city in state.cities],
+                         ["Fresno", "San Francisco"])
+        storage.delete(storage.get(City, other.id))
+        storage.save()
+        storage.close()
+
+    def test_iterate(self):
+        """ iterate yields the pairs of all(cls) """
+        self.assertEqual(dict(storage.iterate(State)), storage.all(State))
+
+    def test_get(self):
+        """ get returns the object with the given class and id """
+        self.assertIs(storage.get(State, self.state.id), self.state)
+        self.assertIs(storage.get('City', self.city.id), self.city)
+        self.assertIsNone(storage.get(State, self.city.id))
+
+    def test_bulk_new(self):
+        """ bulk_new inserts objects and dictionaries """
+        states = [State(name="Nevada"), State(name="Oregon").to_dict()]
+        self.assertEqual(storage.bulk_new(states, chunk=1), 2)
+        storage.save()
+        storage.close()
+        for state in (states[0].id, states[1]['id']):
+            state = storage.get(State, state)
+            self.assertIsNotNone(state)
+            storage.delete(state)
+        storage.save()
+
+    def test_unknown_class(self):
+        """ Class names are looked up among the models, never run """
+        with mock.patch('os.getpid') as getpid:
+            with self.assertRaises(ValueError):
+                storage.bulk_new([{'__class__': '__import__("os").getpid'}])
+            for name in ('__import__("os").getpid', 'BaseModel'):
+                with self.assertRaises(ValueError):
+                    storage.get(name, self.state.id)
+                with self.assertRaises(ValueError):
+                    storage.query(name)
+                with self.assertRaises(ValueError):
+                    storage.all(name)
+        getpid.assert_not_called()
+
+    def test_batch(self):
+        """ Saves in a batch are committed once at its end """
+        session = storage._DBStorage__session
+        with mock.patch.object(session, 'commit') as commit:
+            with storage.batch():
+                storage.save()
+                storage.save()
+                commit.assert_not_called()
+        self.assertEqual(commit.call_count, 1)
+
+    def test_close(self):
+        """ Objects are read again after close """
+        storage.close()
+        state = storage.get(State, self.state.id)
+        self.assertIsNot(state, self.state)
+        self.assertEqual(state.name, "California")
+
+    def test_thread_session(self):
+        """ Each thread works in its own session """
+        session = storage._DBStorage__session
+        sessions = [session()]
+        thread = threading.Thread(target=lambda: sessions.append(session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], sessions[1])
+
+
+class test_DBStorage_pool(unittest.TestCase):
+    """ Class to test the connection pool of the engine """
+
+    def engine(self, url):
+        """ Return the engine of a storage of url sized from the
+        environment """
+        with mock.patch.dict(os.environ, {"HBNB_DB_URL": url,
+                                          "HBNB_DB_POOL_SIZE": "5",
+                                          "HBNB_DB_MAX_OVERFLOW": "2",
+                                          "HBNB_DB_POOL_RECYCLE": "60",
+                                          "HBNB_ENV": ""}):
+            engine = DBStorage()._DBStorage__engine
+        self.addCleanup(engine.dispose)
+        return engine
+
+    def test_sizes(self):
+        """ A pooled engine takes the sizes of the environment """
+        pool = self.engine("sqlite:////tmp/hbnb_test_pool.db").pool
+        self.assertEqual((pool.size(), pool._max_overflow), (5, 2))
+        self.assertEqual(pool._recycle, 60)
+
+    def test_memory(self):
+        """ An in-memory database keeps its single connection and
+        ignores the sizes """
+        pool = self.engine("sqlite://").pool
+        self.assertEqual(type(pool).__name__, "StaticPool")
+        self.assertEqual(pool._recycle, 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,20 +2,61 @@
 """ Module for testing file storage"""
 import unittest
 from models.base_model import BaseModel
+from models.amenity import Amenity
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
 from models import storage
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+from models.engine.writer import Writer
+import json
 import os
+import sys
+from os import getenv
+from unittest import mock
 
 
+def keep(test, *names, **values):
+    """ Restore settings of the storage once a test ends
+    Args:
+        test: TestCase changing them
+        names: names of the settings, without the _FileStorage prefix
+        values: settings to set for the test, restored as well
+    """
+    for name in names + tuple(values):
+        attr = "_FileStorage__" + name
+        test.addCleanup(setattr, storage, attr, getattr(storage, attr))
+    for name, value in values.items():
+        setattr(storage, "_FileStorage__" + name, value)
+
+
+def read_file():
+    """ Return the records of the storage file, whatever its format """
+    with open('file.json', 'rb') as f:
+        return dict(serializers.detect(f).load(f))
+
+
+def write_file(*objs):
+    """ Replace the storage file by one holding objs, in its format, as
+    another process would """
+    with open('file.json', 'rb') as f:
+        fmt = serializers.detect(f)
+    with open('file.json.new', 'wb') as f:
+        fmt.dump([(type(obj).__name__ + '.' + obj.id,
+                   fmt.encode(obj.to_dict())) for obj in objs], f)
+    os.replace('file.json.new', 'file.json')
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
 class test_fileStorage(unittest.TestCase):
     """ Class to test the file storage method """
 
     def setUp(self):
         """ Set up test environment """
-        del_list = []
-        for key in storage._FileStorage__objects.keys():
-            del_list.append(key)
-        for key in del_list:
-            del storage._FileStorage__objects[key]
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
 
     def tearDown(self):
         """ Remove storage file at end of tests """
@@ -80,6 +121,64 @@ class test_fileStorage(unittest.TestCase):
         """ Nothing happens if file does not exist """
         self.assertEqual(storage.reload(), None)
 
+    def test_reload_shares_strings(self):
+        """ Equal ids and short strings read from the file are one
+        object """
+        state = State(name="California")
+        storage.new(state)
+        for name in ("Fresno", "Fresno"):
+            storage.new(City(name=name, state_id=state.id))
+        review = Review(text="A long text, left as read " * 2)
+        storage.new(review)
+        storage.save()
+        storage.reload()
+        state = storage.get(State, state.id)
+        cities = list(storage.all(City).values())
+        self.assertIs(cities[0].state_id, state.id)
+        self.assertIs(cities[1].state_id, state.id)
+        self.assertIs(cities[0].name, cities[1].name)
+        text = storage.get(Review, review.id).text
+        self.assertIsNot(sys.intern("".join(text)), text)
+
+    def test_reload_keeps_changes(self):
+        """ Changes not saved yet are kept over the records reload reads,
+        then saved as they were left """
+        kept = State(name="California")
+        gone = State(name="Nevada")
+        for obj in (kept, gone):
+            storage.new(obj)
+        storage.save()
+        kept.name = "Oregon"
+        storage.delete(gone)
+        for i in range(2):
+            storage.reload()
+            self.assertEqual(storage.get(State, kept.id).name, "Oregon")
+            self.assertIsNone(storage.get(State, gone.id))
+            storage.save()
+
+    def test_save_after_reload(self):
+        """ The first save after reload only serializes changed objects """
+        keep(self, "format")
+        for fmt in (serializers.JSONFormat(), serializers.PackFormat()):
+            storage._FileStorage__format = fmt
+            states = [State(name=str(i)) for i in range(3)]
+            for state in states:
+                storage.new(state)
+            storage.save()
+            storage.reload()
+            storage.get(State, states[0].id).name = "changed"
+            with mock.patch.object(State, "to_dict", autospec=True,
+                                   side_effect=BaseModel.to_dict) as to_dict:
+                storage.save()
+            self.assertEqual(to_dict.call_count, 1)
+            storage.reload()
+            self.assertEqual(sorted(state.name for state in
+                                    storage.all(State).values()),
+                             ["1", "2", "changed"])
+            for obj in list(storage.all().values()):
+                storage.delete(obj)
+            storage.save()
+
     def test_base_model_save(self):
         """ BaseModel save method calls storage save """
         new = BaseModel()
@@ -102,8 +201,797 @@ class test_fileStorage(unittest.TestCase):
             temp = key
         self.assertEqual(temp, 'BaseModel' + '.' + _id)
 
+    def test_all_cls(self):
+        """ all(cls) only returns objects of that class """
+        new = BaseModel()
+        new.save()
+        temp = storage.all(BaseModel)
+        self.assertIn('BaseModel.' + new.id, temp)
+        self.assertEqual(len(temp), len(storage.all()))
+
+    def test_all_cls_load(self):
+        """ Relationships to load are accepted and change nothing """
+        state = State(name="California")
+        state.save()
+        self.assertEqual(dict(storage.all(State, load=["cities"])),
+                         dict(storage.all(State)))
+
+    def test_iterate(self):
+        """ iterate yields the pairs of all(cls), even while deleting """
+        states = [State(name=str(i)) for i in range(3)]
+        for state in states:
+            state.save()
+        for key, obj in storage.iterate(State):
+            self.assertEqual(key, 'State.' + obj.id)
+            storage.delete(obj)
+        self.assertEqual(len(storage.all(State)), 0)
+
+    def test_all_order_by(self):
+        """ all(cls) returns a page of objects in order """
+        for name in ("b", "d", "a", "c"):
+            State(name=name).save()
+        names = [s.name for s in storage.all(State, order_by="name").values()]
+        self.assertEqual(names, ["a", "b", "c", "d"])
+        page = storage.all(State, order_by="-name", limit=2, offset=1)
+        self.assertEqual([s.name for s in page.values()], ["c", "b"])
+        self.assertEqual(len(storage.all(State, limit=3)), 3)
+        with self.assertRaises(ValueError):
+            storage.all(order_by="name")
+
+    def test_all_order_by_follows_updates(self):
+        """ The sorted index follows new, changed and deleted objects """
+        first = State(name="b")
+        first.save()
+        storage.all(State, order_by="name")
+        second = State(name="a")
+        second.save()
+        first.name = "0"
+        storage.delete(second)
+        third = State(name="c")
+        third.save()
+        page = storage.all(State, order_by="name")
+        self.assertEqual(list(page.values()), [first, third])
+
+    def test_all_order_by_merges_classes(self):
+        """ Ordering on a base class merges its subclasses """
+        State(name="b").save()
+        City(name="a").save()
+        BaseModel().save()
+        page = storage.all(BaseModel, order_by="-name", limit=2)
+        self.assertEqual([obj.name for obj in page.values()], ["b", "a"])
+
+    def test_query(self):
+        """ query filters, sorts, pages, projects and counts """
+        state = State(name="California")
+        state.save()
+        cities = [City(name=name, state_id=state.id)
+                  for name in ("Fresno", "Oakland", "Napa", "Fremont")]
+        for city in cities:
+            city.save()
+        City(name="Reno").save()
+        query = storage.query(City).filter(state_id=state.id)
+        self.assertEqual(query.count(), 4)
+        self.assertEqual(query.order_by("name").values("name"),
+                         [("Fremont",), ("Fresno",), ("Napa",), ("Oakland",)])
+        self.assertEqual(query.filter(name__startswith="Fr").order_by(
+            "-name").all(), [cities[0], cities[3]])
+        self.assertEqual(query.filter(name__in=["Napa", "Reno"]).all(),
+                         [cities[2]])
+        self.assertEqual(storage.query("City").order_by("name").offset(
+            1).first(), cities[0])
+        self.assertEqual(storage.query(City).filter(
+            name__gt="Napa", name__le="Reno").order_by("name").values(
+                "name"), [("Oakland",), ("Reno",)])
+        self.assertEqual(storage.query(State).filter(name="Nevada").all(),
+                         [])
+
+    def test_query_sorted_index(self):
+        """ Ranges on a sorted attribute follow changes while walking """
+        states = [State(name="{:03}".format(i)) for i in range(600)]
+        for state in states:
+            storage.new(state)
+        query = storage.query(State).order_by("name")
+        self.assertEqual(query.filter(name__ge="590").count(), 10)
+        for state in query.filter(name__lt="300"):
+            storage.delete(state)
+        self.assertEqual(query.first(), states[300])
+        self.assertEqual(query.filter(name__lt="300").count(), 0)
+        self.assertEqual(query.count(), 300)
+
+    def test_query_has(self):
+        """ has follows the amenity ids of places, in any order """
+        wifi = Amenity(name="Wifi")
+        pool = Amenity(name="Pool")
+        city = City(name="Napa")
+        places = [Place(name=str(i), city_id=city.id) for i in range(3)]
+        for obj in [wifi, pool, city] + places:
+            obj.save()
+        places[0].amenities = wifi
+        places[1].amenities = wifi
+        places[1].amenities = pool
+        query = storage.query(Place).filter(amenities__has=wifi.id)
+        self.assertEqual(query.order_by("name").all(), places[:2])
+        both = query.filter(amenities__has=pool.id)
+        self.assertEqual(both.filter(city_id=city.id).all(), [places[1]])
+        self.assertEqual(both.filter(city_id__in=["x"]).all(), [])
+        places[1].amenity_ids = []
+        self.assertEqual(both.all(), [])
+        self.assertEqual(storage.lookup(Place, "amenity_ids", wifi.id),
+                         [places[0]])
+
+    def test_query_exact_class(self):
+        """ query only selects objects of exactly the class """
+        BaseModel().save()
+        State(name="California").save()
+        self.assertEqual(storage.query(BaseModel).count(), 1)
+        self.assertEqual(len(storage.query(BaseModel).all()), 1)
+
+    def test_generations(self):
+        """ Generations change with the objects of their class """
+        before = storage.generations(State, City)
+        state = State(name="California")
+        state.save()
+        after = storage.generations(State, "City")
+        self.assertNotEqual(after[0], before[0])
+        self.assertEqual(after[1], before[1])
+        state.name = "Nevada"
+        self.assertNotEqual(storage.generations(State), after[:1])
+        after = storage.generations(State)
+        storage.delete(state)
+        self.assertNotEqual(storage.generations(State), after)
+
+    def test_all_cls_read_only(self):
+        """ all(cls) returns a view that cannot be modified """
+        new = BaseModel()
+        new.save()
+        temp = storage.all(BaseModel)
+        with self.assertRaises(TypeError):
+            temp['BaseModel.' + new.id] = None
+
+    def test_all_cls_after_delete(self):
+        """ Deleted objects leave their class bucket """
+        new = BaseModel()
+        new.save()
+        storage.delete(new)
+        self.assertNotIn('BaseModel.' + new.id, storage.all(BaseModel))
+
+    def test_get(self):
+        """ get returns the object with the given class and id """
+        new = State(name="California")
+        new.save()
+        self.assertIs(storage.get(State, new.id), new)
+        self.assertIs(storage.get("State", new.id), new)
+        self.assertIsNone(storage.get(State, "missing"))
+
+    def test_lookup(self):
+        """ Reverse indexes resolve the objects pointing to an id """
+        state = State(name="California")
+        state.save()
+        city = City(name="San Francisco", state_id=state.id)
+        city.save()
+        place = Place(name="House", city_id=city.id)
+        place.save()
+        review = Review(text="Nice", place_id=place.id)
+        review.save()
+        self.assertEqual(storage.lookup(City, "state_id", state.id), [city])
+        self.assertEqual(state.cities, [city])
+        self.assertEqual(city.places, [place])
+        self.assertEqual(place.reviews, [review])
+
+    def test_lookup_follows_updates(self):
+        """ Reverse indexes follow foreign key updates and deletes """
+        state = State(name="California")
+        state.save()
+        other = State(name="Nevada")
+        other.save()
+        city = City(name="San Francisco", state_id=state.id)
+        city.save()
+        city.__dict__.update({"state_id": other.id})
+        city.save()
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        storage.delete(city)
+        self.assertEqual(other.cities, [])
+
+    def test_state_cities_sorted(self):
+        """ State.cities is sorted by name and only sorted again after
+        a change to a city """
+        state = State(name="California")
+        state.save()
+        other = State(name="Nevada")
+        other.save()
+        napa = City(name="Napa", state_id=state.id)
+        napa.save()
+        fresno = City(name="Fresno", state_id=state.id)
+        fresno.save()
+        self.assertEqual(state.cities, [fresno, napa])
+        with mock.patch.object(FileStorage, 'query') as query:
+            self.assertEqual(state.cities, [fresno, napa])
+        query.assert_not_called()
+        reno = City(name="Reno", state_id=other.id)
+        reno.save()
+        reno.state_id = state.id
+        self.assertEqual(state.cities, [fresno, napa, reno])
+        self.assertEqual(other.cities, [])
+        napa.name = "Anaheim"
+        self.assertEqual(state.cities, [napa, fresno, reno])
+        storage.delete(fresno)
+        self.assertEqual(state.cities, [napa, reno])
+
+    def test_sorted_lookups_forgotten(self):
+        """ The sorted lookups of a class are forgotten once one of its
+        objects changes, so they do not pile up """
+        memo = storage._FileStorage__memo
+        states = [State(name="State {}".format(i)) for i in range(5)]
+        for state in states:
+            state.save()
+            self.assertEqual(state.cities, [])
+        self.assertGreaterEqual(len(memo["City"]), 5)
+        napa = City(name="Napa", state_id=states[0].id)
+        napa.save()
+        self.assertNotIn("City", memo)
+        self.assertEqual(states[0].cities, [napa])
+        self.assertEqual(len(memo["City"]), 1)
+
+    def test_save_attribute_change(self):
+        """ Attributes set on a stored object are saved """
+        new = State(name="California")
+        new.save()
+        new.name = "Nevada"
+        storage.save()
+        self.assertEqual(read_file()['State.' + new.id]['name'], 'Nevada')
+
+    def test_save_only_changed(self):
+        """ Save only serializes objects changed since the last save """
+        new = BaseModel()
+        new.save()
+        other = BaseModel()
+        other.save()
+        with mock.patch.object(BaseModel, 'to_dict', autospec=True,
+                               side_effect=BaseModel.to_dict) as to_dict:
+            new.save()
+        to_dict.assert_called_once_with(new)
+        self.assertIn('BaseModel.' + other.id, read_file())
+
+    def test_bulk_new(self):
+        """ bulk_new adds objects and dictionaries, saved by one save """
+        state = State(name="California")
+        city = City(name="San Francisco", state_id=state.id).to_dict()
+        other = {"__class__": "State", "name": "Nevada"}
+        self.assertEqual(storage.bulk_new([state, city, other]), 3)
+        self.assertIs(storage.get(State, state.id), state)
+        self.assertEqual([c.id for c in state.cities], [city['id']])
+        self.assertEqual(len(storage.all(State)), 2)
+        storage.save()
+        self.assertIn('City.' + city['id'], read_file())
+
+    def test_bulk_new_invalid(self):
+        """ bulk_new adds nothing when a dictionary is invalid """
+        state = State(name="California").to_dict()
+        for bad in ({"__class__": "Nowhere"}, dict(state, id=5),
+                    dict(state, created_at="yesterday"),
+                    dict(state, updated_at=None, created_at=3)):
+            with self.assertRaises(ValueError):
+                storage.bulk_new([state, bad])
+            self.assertIsNone(storage.get(State, state['id']))
+        storage.save()
+        storage.reload()
+        self.assertIsNone(storage.get(State, state['id']))
+
+    def test_batch(self):
+        """ Saves in a batch are written once at its end """
+        with mock.patch.object(FileStorage, '_FileStorage__write') as write:
+            with storage.batch():
+                for i in range(3):
+                    State(name=str(i)).save()
+                write.assert_not_called()
+        self.assertEqual(write.call_count, 1)
+
     def test_storage_var_created(self):
         """ FileStorage object storage created """
         from models.engine.file_storage import FileStorage
         print(type(storage))
         self.assertEqual(type(storage), FileStorage)
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
+class test_fileStorageJournal(unittest.TestCase):
+    """ Class to test the journal mode of file storage """
+
+    def setUp(self):
+        """ Set up test environment in journal mode """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        keep(self, "compact_after", journal=True)
+        storage.compact()
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in ('file.json', 'file.json.log'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_save_appends(self):
+        """ Save only appends the changed records to the log """
+        new = BaseModel()
+        new.save()
+        size = os.path.getsize('file.json')
+        other = BaseModel()
+        other.save()
+        self.assertEqual(os.path.getsize('file.json'), size)
+        with open('file.json.log') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_reload_replays_log(self):
+        """ Reload applies new and deleted records from the log """
+        new = BaseModel()
+        new.save()
+        gone = BaseModel()
+        gone.save()
+        gone.delete()
+        storage.save()
+        storage.reload()
+        self.assertIn('BaseModel.' + new.id, storage.all())
+        self.assertNotIn('BaseModel.' + gone.id, storage.all())
+
+    def test_reload_torn_log(self):
+        """ A partially written last record is ignored """
+        new = BaseModel()
+        new.save()
+        with open('file.json.log', 'a') as f:
+            f.write('{"key": "BaseModel.')
+        storage.reload()
+        self.assertIn('BaseModel.' + new.id, storage.all())
+
+    def test_append_after_torn_log(self):
+        """ Records appended after a torn line are replayed """
+        new = BaseModel()
+        new.save()
+        with open('file.json.log', 'a') as f:
+            f.write('{"key": "BaseModel.')
+        other = BaseModel()
+        other.save()
+        with open('file.json.log', 'a') as f:
+            f.write('{"key": "Base\n')
+        last = BaseModel()
+        last.save()
+        storage.reload()
+        for obj in (new, other, last):
+            self.assertIn('BaseModel.' + obj.id, storage.all())
+
+    def test_compact(self):
+        """ Compaction folds the log into the snapshot """
+        storage._FileStorage__compact_after = 2
+        new = BaseModel()
+        new.save()
+        other = BaseModel()
+        other.save()
+        self.assertFalse(os.path.exists('file.json.log'))
+        self.assertIn('BaseModel.' + other.id, read_file())
+
+    def test_round_trip(self):
+        """ Objects saved to the log are read back as they were left """
+        state = State(name="California")
+        state.save()
+        city = City(name="Napa", state_id=state.id)
+        city.save()
+        state.name = "Nevada"
+        state.save()
+        city.delete()
+        storage.save()
+        storage.reload()
+        self.assertIsNot(storage.get(State, state.id), state)
+        self.assertEqual(storage.get(State, state.id).name, "Nevada")
+        self.assertIsNone(storage.get(City, city.id))
+        self.assertEqual(storage.get(State, state.id).cities, [])
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
+class test_fileStorageLazy(unittest.TestCase):
+    """ Class to test the lazy reload mode of file storage """
+
+    def setUp(self):
+        """ Save a few objects and reload them lazily """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        self.state = State(name="California")
+        self.state.save()
+        self.city = City(name="San Francisco", state_id=self.state.id)
+        self.city.save()
+        storage.compact()
+        keep(self, lazy=True)
+        storage.reload()
+
+    def tearDown(self):
+        """ Build the records left and remove storage file """
+        storage.all()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_reload_keeps_records(self):
+        """ Reload does not build objects """
+        self.assertEqual(storage._FileStorage__objects, {})
+
+    def test_get(self):
+        """ get builds only the requested object """
+        state = storage.get(State, self.state.id)
+        self.assertEqual(state.name, "California")
+        self.assertIsNot(state, self.state)
+        self.assertEqual(list(storage._FileStorage__objects),
+                         ['State.' + self.state.id])
+
+    def test_relationship(self):
+        """ Relationship properties build the related objects """
+        state = storage.get(State, self.state.id)
+        self.assertEqual([city.id for city in state.cities],
+                         [self.city.id])
+
+    def test_all(self):
+        """ all(cls) builds the objects of that class """
+        self.assertIn('City.' + self.city.id, storage.all(City))
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_all_order_by(self):
+        """ A page only builds the objects it holds """
+        page = storage.all(City, order_by="name", limit=1)
+        self.assertEqual(list(page), ['City.' + self.city.id])
+        self.assertEqual(list(storage._FileStorage__objects),
+                         ['City.' + self.city.id])
+
+    def test_query(self):
+        """ A query only builds the objects it returns """
+        self.assertEqual(storage.query(City).count(), 1)
+        self.assertEqual(storage.query(City).values("name"),
+                         [("San Francisco",)])
+        self.assertEqual(storage._FileStorage__objects, {})
+        city = storage.query(City).filter(state_id=self.state.id).first()
+        self.assertEqual(city.id, self.city.id)
+        self.assertEqual(list(storage._FileStorage__objects),
+                         ['City.' + self.city.id])
+
+    def test_save_keeps_records(self):
+        """ Records never built are still saved """
+        storage.get(State, self.state.id).save()
+        self.assertIn('City.' + self.city.id, read_file())
+
+    def test_delete_unbuilt(self):
+        """ Deleting an object never built removes its record """
+        storage.delete(self.city)
+        self.assertNotIn('City.' + self.city.id, storage.all(City))
+        self.assertEqual(storage.get(State, self.state.id).cities, [])
+        storage.save()
+        storage.reload()
+        self.assertIsNone(storage.get(City, self.city.id))
+        self.assertIsNotNone(storage.get(State, self.state.id))
+
+    def test_delete_bulk_new(self):
+        """ Deleting an object added as a dictionary removes it """
+        city = City(name="Oakland", state_id=self.state.id).to_dict()
+        storage.bulk_new([city])
+        storage.delete(City(**city))
+        self.assertEqual(storage.query(City).filter(
+            state_id=self.state.id).values("id"), [(self.city.id,)])
+        storage.save()
+        storage.reload()
+        self.assertIsNone(storage.get(City, city['id']))
+
+    def test_round_trip(self):
+        """ Objects read lazily are updated, deleted and saved like
+        the others """
+        oakland = City(name="Oakland", state_id=self.state.id)
+        storage.new(oakland)
+        storage.get(City, self.city.id).name = "Anaheim"
+        storage.save()
+        storage.reload()
+        state = storage.get(State, self.state.id)
+        self.assertEqual([city.name for city in state.cities],
+                         ["Anaheim", "Oakland"])
+        storage.delete(storage.get(City, oakland.id))
+        storage.save()
+        storage.reload()
+        self.assertEqual(storage.query(City).filter(
+            state_id=self.state.id).values("name"), [("Anaheim",)])
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_reload_keeps_encoded(self):
+        """ Reload keeps the encoded records, not their dictionaries """
+        if storage._FileStorage__mmap:
+            self.skipTest("mapped mode keeps the records in the map")
+        key = 'City.' + self.city.id
+        record = storage._FileStorage__raw['City'][key]
+        self.assertIsInstance(record, (str, bytes))
+        self.assertIs(storage._FileStorage__cache[key], record)
+        self.assertEqual(storage.query(City).filter(
+            name="San Francisco").values("id"), [(self.city.id,)])
+
+    def test_convert(self):
+        """ Encoded records are converted to another format """
+        if storage._FileStorage__mmap:
+            self.skipTest("mapped mode keeps the records in the map")
+        keep(self, "format", "format_pinned")
+        storage.convert("pack")
+        storage.reload()
+        self.assertIsInstance(storage._FileStorage__raw['City'][
+            'City.' + self.city.id], bytes)
+        storage.convert("json")
+        self.assertEqual(storage.get(City, self.city.id).name,
+                         "San Francisco")
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
+class test_fileStorageMapped(unittest.TestCase):
+    """ Class to test the mapped mode of file storage """
+
+    def setUp(self):
+        """ Save a few objects in a packed file and map it """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        keep(self, format=serializers.PackFormat(), mmap=True, lazy=True)
+        self.state = State(name="California")
+        self.state.save()
+        self.city = City(name="San Francisco", state_id=self.state.id)
+        self.city.save()
+        storage.compact()
+        storage.reload()
+
+    def tearDown(self):
+        """ Read the records left, unmap the file and remove it """
+        storage.all()
+        storage._FileStorage__mapped.close()
+        storage._FileStorage__mapped = None
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_reload_maps(self):
+        """ Reload reads no record """
+        self.assertEqual(storage._FileStorage__objects, {})
+        self.assertEqual(storage._FileStorage__raw, {})
+
+    def test_get(self):
+        """ get decodes only the requested record """
+        state = storage.get(State, self.state.id)
+        self.assertEqual(state.name, "California")
+        self.assertIsNot(state, self.state)
+        self.assertEqual(list(storage._FileStorage__objects),
+                         ['State.' + self.state.id])
+        self.assertEqual(storage._FileStorage__raw, {})
+        self.assertIs(storage.get(State, self.state.id), state)
+        self.assertIsNone(storage.get(State, self.city.id))
+
+    def test_relationship(self):
+        """ Relationship properties read the records of their class """
+        state = storage.get(State, self.state.id)
+        self.assertEqual([city.id for city in state.cities],
+                         [self.city.id])
+
+    def test_all(self):
+        """ all(cls) reads the records of that class """
+        self.assertIn('City.' + self.city.id, storage.all(City))
+        self.assertNotIn('State', storage._FileStorage__raw)
+        self.assertEqual(len(storage.all()), 2)
+
+    def test_save_keeps_records(self):
+        """ Records never read are still saved """
+        state = storage.get(State, self.state.id)
+        state.name = "Nevada"
+        state.save()
+        storage.reload()
+        self.assertEqual(storage.get(State, self.state.id).name, "Nevada")
+        self.assertIsNotNone(storage.get(City, self.city.id))
+
+    def test_delete_new(self):
+        """ An object added over a mapped record stays deleted """
+        state = State(**self.state.to_dict())
+        storage.new(state)
+        storage.delete(state)
+        storage.save()
+        storage.reload()
+        self.assertIsNone(storage.get(State, self.state.id))
+        self.assertIsNotNone(storage.get(City, self.city.id))
+
+    def test_delete_unread(self):
+        """ Deleting an object whose record was never read drops it """
+        storage.delete(self.state)
+        storage.save()
+        storage.reload()
+        self.assertIsNone(storage.get(State, self.state.id))
+        self.assertIsNotNone(storage.get(City, self.city.id))
+
+    def test_round_trip(self):
+        """ Objects read from the map are updated, deleted and saved
+        like the others """
+        nevada = State(name="Nevada")
+        nevada.save()
+        storage.get(City, self.city.id).state_id = nevada.id
+        storage.delete(storage.get(State, self.state.id))
+        storage.save()
+        storage.flush()
+        storage.reload()
+        self.assertIsNone(storage.get(State, self.state.id))
+        self.assertEqual([city.id for city in
+                          storage.get(State, nevada.id).cities],
+                         [self.city.id])
+        self.assertEqual(storage.query(State).values("name"),
+                         [("Nevada",)])
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
+class test_fileStorageWrites(unittest.TestCase):
+    """ Class to test how file storage writes its file """
+
+    def setUp(self):
+        """ Set up test environment """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        storage.flush()
+        keep(self, "fsync", writer=None, journal=False)
+        self.state = State(name="California")
+        self.state.save()
+
+    def tearDown(self):
+        """ Wait for the writer and remove storage file """
+        storage.flush()
+        try:
+            os.remove('file.json')
+        except FileNotFoundError:
+            pass
+
+    def test_save_atomic(self):
+        """ A save that fails before the rename keeps the old file """
+        self.state.name = "Nevada"
+        with mock.patch('os.replace', side_effect=OSError):
+            with self.assertRaises(OSError):
+                storage.save()
+        value = read_file()['State.' + self.state.id]
+        self.assertEqual(value['name'], "California")
+        os.remove('file.json.tmp')
+
+    def test_fsync_always(self):
+        """ Every save is forced to disk in "always" mode """
+        storage._FileStorage__fsync = "always"
+        with mock.patch('os.fsync') as fsync:
+            self.state.save()
+        self.assertGreaterEqual(fsync.call_count, 2)
+
+    def test_fsync_never(self):
+        """ Nothing is forced to disk in "never" mode """
+        storage._FileStorage__fsync = "never"
+        with mock.patch('os.fsync') as fsync:
+            self.state.save()
+            storage.flush()
+        fsync.assert_not_called()
+
+    def test_flush(self):
+        """ flush forces the file to disk in "batched" mode """
+        with mock.patch('os.fsync') as fsync:
+            self.state.save()
+            fsync.assert_not_called()
+            storage.flush()
+        self.assertGreaterEqual(fsync.call_count, 1)
+
+    def test_background_save(self):
+        """ Saves handed to the writer are written by flush """
+        storage._FileStorage__writer = Writer(60)
+        for name in ("Nevada", "Oregon", "Texas"):
+            self.state.name = name
+            self.state.save()
+        value = read_file()['State.' + self.state.id]
+        self.assertEqual(value['name'], "California")
+        storage.flush()
+        value = read_file()['State.' + self.state.id]
+        self.assertEqual(value['name'], "Texas")
+
+    def test_background_save_changes(self):
+        """ Only the first save hands the whole snapshot to the writer """
+        storage._FileStorage__writer = Writer(60)
+        self.state.save()
+        storage.flush()
+        city = City(name="San Francisco", state_id=self.state.id)
+        city.save()
+        self.state.name = "Nevada"
+        self.state.save()
+        self.assertEqual(set(storage._FileStorage__changes),
+                         {'City.' + city.id, 'State.' + self.state.id})
+        storage.delete(city)
+        storage.save()
+        self.assertIsNone(storage._FileStorage__changes['City.' + city.id])
+        storage.flush()
+        doc = read_file()
+        self.assertNotIn('City.' + city.id, doc)
+        self.assertEqual(doc['State.' + self.state.id]['name'], "Nevada")
+
+    def test_background_save_fsync(self):
+        """ The writer forces its snapshot to disk before renaming it """
+        storage._FileStorage__writer = Writer(60)
+        calls = []
+        replace = os.replace
+
+        def renamed(*args):
+            """ Rename after recording the call """
+            calls.append('replace')
+            replace(*args)
+        with mock.patch('os.fsync', side_effect=lambda fd: calls.append(
+                'fsync')), mock.patch('os.replace', side_effect=renamed):
+            self.state.save()
+            storage.flush()
+        self.assertEqual(calls[:2], ['fsync', 'replace'])
+
+
+@unittest.skipIf(getenv("HBNB_TYPE_STORAGE") == "db", "FileStorage only")
+class test_fileStorageClose(unittest.TestCase):
+    """ Class to test the refresh of file storage on close """
+
+    def setUp(self):
+        """ Save an object """
+        for obj in list(storage.all().values()):
+            storage.delete(obj)
+        storage.flush()
+        keep(self, journal=False)
+        self.state = State(name="California")
+        self.state.save()
+        storage.flush()
+
+    def tearDown(self):
+        """ Remove storage files """
+        for path in ('file.json', 'file.json.log'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def test_close_unchanged(self):
+        """ close does not read a file written by this storage """
+        with mock.patch.object(FileStorage, 'reload') as reload:
+            storage.close()
+        reload.assert_not_called()
+        self.assertIs(storage.get(State, self.state.id), self.state)
+
+    def test_close_changed(self):
+        """ close reads a file written by someone else """
+        write_file(State(**dict(self.state.to_dict(), name="Nevada")))
+        storage.close()
+        self.assertEqual(storage.get(State, self.state.id).name, "Nevada")
+
+    def test_close_drops_removed(self):
+        """ close drops the objects gone from a file rewritten by someone
+        else, and their index entries """
+        city = City(name="San Francisco", state_id=self.state.id)
+        city.save()
+        storage.flush()
+        self.assertEqual(len(storage.all(City, order_by="name")), 1)
+        write_file(self.state)
+        other = City(name="Oakland", state_id=self.state.id)
+        storage.new(other)
+        storage.close()
+        self.assertIsNone(storage.get(City, city.id))
+        self.assertEqual(list(storage.all(City, order_by="name")),
+                         ['City.' + other.id])
+        self.assertEqual(storage.query(City).filter(
+            state_id=self.state.id).values("id"), [(other.id,)])
+        self.assertIsNotNone(storage.get(State, self.state.id))
+
+    def test_close_replays_new_records(self):
+        """ close only replays the records appended to the log """
+        storage._FileStorage__journal = True
+        city = City(name="San Francisco", state_id=self.state.id)
+        city.save()
+        value = dict(city.to_dict(), name="Oakland")
+        with open('file.json.log', 'a') as f:
+            f.write(json.dumps({"key": "City." + city.id,
+                                "value": value}) + "\n")
+            f.write('{"key": "City.')
+        with mock.patch.object(FileStorage, 'reload') as reload:
+            storage.close()
+        reload.assert_not_called()
+        self.assertIs(storage.get(State, self.state.id), self.state)
+        self.assertEqual(storage.get(City, city.id).name, "Oakland")
+        with open('file.json.log', 'a') as f:
+            f.write(city.id + '"}\n')
+        storage.close()
+        self.assertIsNone(storage.get(City, city.id))
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+""" Module for testing the streaming JSON reader and writer"""
+import io
+import json
+import unittest
+from models.engine import json_stream
+
+
+class test_jsonStream(unittest.TestCase):
+    """ Class to test the json_stream module """
+
+    def setUp(self):
+        """ Set up a document with a few records """
+        self.doc = {"State.{}".format(i): {"id": str(i), "name": "}, {" * i}
+                    for i in range(50)}
+
+    def test_dump(self):
+        """ dump writes a document json can read """
+        f = io.StringIO()
+        json_stream.dump(((k, json.dumps(v)) for k, v in self.doc.items()),
+                         f)
+        self.assertEqual(json.loads(f.getvalue()), self.doc)
+
+    def test_load(self):
+        """ load yields every member in order """
+        f = io.StringIO(json.dumps(self.doc))
+        self.assertEqual(list(json_stream.load(f)), list(self.doc.items()))
+
+    def test_load_small_chunks(self):
+        """ Records spanning several reads are decoded """
+        for text in (json.dumps(self.doc), json.dumps(self.doc, indent=4)):
+            for size in (1, 3, 16):
+                f = io.StringIO(text)
+                self.assertEqual(dict(json_stream.load(f, size)), self.doc)
+
+    def test_load_empty_object(self):
+        """ An empty object has no members """
+        self.assertEqual(list(json_stream.load(io.StringIO(" {} "))), [])
+
+    def test_load_invalid(self):
+        """ Anything but a complete JSON object raises ValueError """
+        for text in ("", "[]", '{"a": {}', '{"a" {}}', '{"a": {}, }'):
+            with self.assertRaises(ValueError):
+                list(json_stream.load(io.StringIO(text), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+""" Module for testing the query builder"""
+import unittest
+from models.engine.query import Query, compare
+from models.place import Place
+
+
+class test_query(unittest.TestCase):
+    """ Class to test the Query class """
+
+    def setUp(self):
+        """ Build a query on no storage """
+        self.query = Query(None, Place)
+
+    def test_filter(self):
+        """ filter parses the operators and keeps the query unchanged """
+        query = self.query.filter(city_id="1", price_by_night__lt=100)
+        self.assertEqual(query.conditions, [("city_id", "eq", "1"),
+                                            ("price_by_night", "lt", 100)])
+        self.assertEqual(self.query.conditions, [])
+        with self.assertRaises(ValueError):
+            self.query.filter(name__like="a")
+
+    def test_chain(self):
+        """ order_by, limit and offset return new queries """
+        query = self.query.order_by("-name").limit(10).offset(20)
+        self.assertEqual((query.ordering, query.size, query.skip),
+                         ("-name", 10, 20))
+        self.assertEqual((self.query.ordering, self.query.size,
+                          self.query.skip), (None, None, 0))
+
+    def test_match(self):
+        """ match tests every condition on the values of an object """
+        query = self.query.filter(name__startswith="Ho", max_guest__ge=2)
+        values = {"name": "House", "max_guest": 2}
+        self.assertTrue(query.match(values.get))
+        values["max_guest"] = 1
+        self.assertFalse(query.match(values.get))
+
+    def test_compare_none(self):
+        """ None only equals None, as NULL in SQL """
+        self.assertTrue(compare("eq", None, None))
+        self.assertTrue(compare("ne", "a", None))
+        self.assertFalse(compare("ne", None, "a"))
+        self.assertFalse(compare("lt", None, 1))
+        self.assertFalse(compare("in", None, [None]))
+        self.assertFalse(compare("startswith", 1, "a"))
+        self.assertFalse(compare("has", None, "a"))
+
+    def test_compare_has(self):
+        """ has tests that a list of ids holds one """
+        self.assertTrue(compare("has", ["a", "b"], "b"))
+        self.assertFalse(compare("has", [], "b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
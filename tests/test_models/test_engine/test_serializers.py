@@ -0,0 +1,116 @@
+#!/usr/bin/python3
+""" Module for testing the snapshot formats"""
+import io
+import tempfile
+import unittest
+from datetime import datetime
+from models.engine import serializers
+
+
+class test_serializers(unittest.TestCase):
+    """ Class to test the serializers module """
+
+    def setUp(self):
+        """ Set up records of a few shapes """
+        self.doc = {}
+        for i in range(20):
+            self.doc["Place.{}".format(i)] = {
+                "id": str(i), "name": "é" * i, "number_rooms": i,
+                "latitude": i / 3, "city_id": None, "open": i % 2 == 0,
+                "amenity_ids": [str(i)], "big": 1 << 70,
+                "created_at": "2017-09-28T21:05:54.119427",
+                "updated_at": "2017-09-28T21:05:54",
+                "__class__": "Place"}
+        self.doc["State.x"] = {"id": "x", "__class__": "State",
+                               "created_at": "1969-12-31T23:59:59.000001",
+                               "updated_at": "2017-09-28T21:05:54"}
+
+    def dump(self, fmt):
+        """ Write the records to a buffer and rewind it """
+        f = io.BytesIO()
+        fmt.dump(((k, fmt.encode(v)) for k, v in self.doc.items()), f)
+        f.seek(0)
+        return f
+
+    def mapped(self):
+        """ Write the records to a packed file and map it """
+        with tempfile.TemporaryFile() as f:
+            f.write(self.dump(serializers.PackFormat()).getvalue())
+            f.seek(0)
+            return serializers.PackFile(f)
+
+    def test_json(self):
+        """ JSON records load back unchanged """
+        f = self.dump(serializers.JSONFormat())
+        self.assertIsInstance(serializers.detect(f), serializers.JSONFormat)
+        self.assertEqual(dict(serializers.JSONFormat().load(f)), self.doc)
+
+    def test_pack(self):
+        """ Packed records load back with datetime timestamps """
+        f = self.dump(serializers.PackFormat())
+        reader = serializers.detect(f)
+        self.assertIsInstance(reader, serializers.PackFormat)
+        doc = dict(reader.load(f))
+        self.assertEqual(list(doc), list(self.doc))
+        for key, value in doc.items():
+            for name in serializers.TIMESTAMPS:
+                self.assertIsInstance(value[name], datetime)
+                value[name] = value[name].isoformat()
+            self.assertEqual(value, self.doc[key])
+
+    def test_pack_smaller(self):
+        """ The packed file is smaller than the JSON one """
+        pack = self.dump(serializers.PackFormat()).getvalue()
+        text = self.dump(serializers.JSONFormat()).getvalue()
+        self.assertLess(len(pack), len(text))
+
+    def test_datetimes(self):
+        """ Records holding datetimes are encoded by both formats """
+        value = {"id": "y", "__class__": "User",
+                 "created_at": datetime(2020, 1, 2, 3, 4, 5, 6),
+                 "updated_at": datetime(2020, 1, 2)}
+        for fmt in serializers.formats.values():
+            fmt = fmt()
+            f = io.BytesIO()
+            fmt.dump([("User.y", fmt.encode(value))], f)
+            f.seek(0)
+            loaded = dict(serializers.detect(f).load(f))["User.y"]
+            for name in serializers.TIMESTAMPS:
+                stamp = loaded[name]
+                if isinstance(stamp, str):
+                    stamp = datetime.fromisoformat(stamp)
+                self.assertEqual(stamp, value[name])
+
+    def test_pack_truncated(self):
+        """ A truncated packed file raises ValueError """
+        data = self.dump(serializers.PackFormat()).getvalue()
+        for size in (4, 40):
+            with self.assertRaises(ValueError):
+                list(serializers.PackFormat().load(io.BytesIO(data[:size])))
+
+    def test_pack_file_pop(self):
+        """ A mapped file returns each record once """
+        mapped = self.mapped()
+        value = mapped.pop("Place.7")
+        self.assertEqual(value["name"], "é" * 7)
+        self.assertIsNone(mapped.pop("Place.7"))
+        self.assertIsNone(mapped.pop("Place.70"))
+        self.assertIsNone(mapped.pop("Place."))
+        mapped.discard("State.x")
+        self.assertIsNone(mapped.pop("State.x"))
+        mapped.close()
+
+    def test_pack_file_items(self):
+        """ items only returns the records of a class not taken yet """
+        mapped = self.mapped()
+        self.assertEqual(dict(mapped.items("State."))["State.x"]["id"], "x")
+        mapped.pop("Place.3")
+        places = [key for key, value in mapped.items("Place.")]
+        self.assertEqual(places, sorted(set(self.doc) - {"Place.3",
+                                                         "State.x"}))
+        self.assertEqual(list(mapped.items()), [])
+        mapped.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
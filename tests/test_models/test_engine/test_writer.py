@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+""" Module for testing the background writer"""
+import os
+import signal
+import threading
+import unittest
+from models.engine.writer import Writer
+
+
+class test_writer(unittest.TestCase):
+    """ Class to test the Writer class """
+
+    def test_flush_runs_job(self):
+        """ flush returns once the submitted job ran """
+        done = []
+        writer = Writer(60)
+        writer.submit(lambda: done.append(1))
+        writer.flush()
+        self.assertEqual(done, [1])
+
+    def test_coalesce(self):
+        """ Jobs submitted while one waits replace it """
+        done = []
+        writer = Writer(60)
+        for i in range(3):
+            writer.submit(lambda i=i: done.append(i))
+        writer.flush()
+        self.assertEqual(done, [2])
+
+    def test_runs_in_background(self):
+        """ Jobs do not run in the thread that submits them """
+        threads = []
+        writer = Writer()
+        writer.submit(lambda: threads.append(threading.current_thread()))
+        writer.flush()
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_error(self):
+        """ flush raises the error of a failed job once """
+        writer = Writer()
+        writer.submit(lambda: 1 / 0)
+        with self.assertRaises(ZeroDivisionError):
+            writer.flush()
+        writer.flush()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_fork(self):
+        """ A forked child runs its jobs in a thread of its own """
+        writer = Writer(60)
+        pid = os.fork()
+        if pid == 0:
+            signal.alarm(10)
+            done = []
+            writer.submit(lambda: done.append(1))
+            writer.flush()
+            os._exit(0 if done == [1] else 1)
+        self.assertEqual(os.waitpid(pid, 0)[1], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
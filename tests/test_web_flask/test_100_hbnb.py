@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+""" Module for testing the routes of web_flask/100-hbnb.py"""
+import unittest
+from importlib import import_module
+from os import getenv
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+from models.user import User
+
+
+class test_places_search(unittest.TestCase):
+    """ Class to test the /places_search route """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create the application once """
+        cls.client = import_module("web_flask.100-hbnb").app.test_client()
+
+    def setUp(self):
+        """ Save two states, with places in two cities of the first """
+        self.user = User(email="a@b.c", password="pwd")
+        self.california = State(name="California")
+        self.nevada = State(name="Nevada")
+        self.sf = City(name="San Francisco", state_id=self.california.id)
+        self.oakland = City(name="Oakland", state_id=self.california.id)
+        self.reno = City(name="Reno", state_id=self.nevada.id)
+        self.wifi = Amenity(name="Wifi")
+        self.pool = Amenity(name="Pool")
+        self.places = [Place(name="Place {}".format(i), user_id=self.user.id,
+                             city_id=city.id)
+                       for i, city in enumerate((self.sf, self.sf,
+                                                 self.oakland, self.reno))]
+        self.add_amenity(self.places[0], self.wifi)
+        self.add_amenity(self.places[1], self.wifi)
+        self.add_amenity(self.places[1], self.pool)
+        self.add_amenity(self.places[3], self.pool)
+        self.objs = [self.user, self.california, self.nevada, self.sf,
+                     self.oakland, self.reno, self.wifi, self.pool]
+        self.objs.extend(self.places)
+        for obj in self.objs:
+            storage.new(obj)
+        storage.save()
+        storage.close()
+
+    def tearDown(self):
+        """ Remove the objects """
+        for obj in reversed(self.objs):
+            storage.delete(storage.get(type(obj), obj.id))
+        storage.save()
+        storage.close()
+
+    @staticmethod
+    def add_amenity(place, amenity):
+        """ Give an amenity to a place in either storage """
+        if getenv("HBNB_TYPE_STORAGE") == "db":
+            place.amenities.append(amenity)
+        else:
+            place.amenities = amenity
+
+    def search(self, body, query=""):
+        """ Return the ids of the places found and the response """
+        response = self.client.post("/places_search" + query, json=body)
+        self.assertEqual(response.status_code, 200)
+        found = response.get_json()
+        return [place["id"] for place in found["places"]], found
+
+    def test_states(self):
+        """ A state stands for its cities, added to the cities given """
+        ids, found = self.search({"states": [self.california.id]})
+        self.assertEqual(ids, [place.id for place in self.places[:3]])
+        ids, found = self.search({"states": [self.california.id],
+                                  "cities": [self.reno.id]})
+        self.assertEqual(ids, [place.id for place in self.places])
+        ids, found = self.search({"cities": [self.oakland.id]})
+        self.assertEqual(ids, [self.places[2].id])
+
+    def test_amenities(self):
+        """ A place has to hold every amenity given """
+        ids, found = self.search({"amenities": [self.wifi.id]})
+        self.assertEqual(ids, [place.id for place in self.places[:2]])
+        ids, found = self.search({"amenities": [self.wifi.id,
+                                                self.pool.id]})
+        self.assertEqual(ids, [self.places[1].id])
+        ids, found = self.search({"states": [self.nevada.id],
+                                  "amenities": [self.wifi.id]})
+        self.assertEqual(ids, [])
+
+    def test_pages(self):
+        """ The places are paged in name order """
+        body = {"states": [self.california.id, self.nevada.id]}
+        ids, found = self.search(body, "?per_page=3")
+        self.assertEqual(ids, [place.id for place in self.places[:3]])
+        self.assertTrue(found["has_next"])
+        ids, found = self.search(body, "?per_page=3&page=2")
+        self.assertEqual(ids, [self.places[3].id])
+        self.assertFalse(found["has_next"])
+        self.assertEqual((found["page"], found["per_page"]), (2, 3))
+
+    def test_bad_request(self):
+        """ The filters have to be lists of ids """
+        for body in ({"cities": 5}, {"states": self.california.id},
+                     {"amenities": {"id": self.wifi.id}},
+                     {"cities": [self.sf.id, 5]}, {"states": None},
+                     [self.sf.id]):
+            response = self.client.post("/places_search", json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn("error", response.get_json())
+        response = self.client.post("/places_search", data="cities",
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+""" Module for testing the application of every web_flask route"""
+import unittest
+from importlib import import_module
+from unittest import mock
+from web_flask.app import create_app, warm
+from web_flask.cache import cache
+
+
+class test_create_app(unittest.TestCase):
+    """ Class to test the create_app function """
+
+    @classmethod
+    def setUpClass(cls):
+        """ Create the application once """
+        cls.client = create_app().test_client()
+
+    def setUp(self):
+        """ Render every page """
+        cache.clear()
+
+    def test_routes(self):
+        """ The routes of every module are served """
+        for path, body in (("/", b"Hello HBNB!"), ("/hbnb", b"HBNB"),
+                           ("/c/is_fun", b"C is fun"),
+                           ("/python", b"Python is cool"),
+                           ("/number/3", b"3 is a number")):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.data, body)
+        for path in ("/number_odd_or_even/3", "/states_list",
+                     "/cities_by_states", "/states", "/states/x"):
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+
+    def test_latest_route(self):
+        """ A path is served by the latest module serving it """
+        self.assertIn(b"<h1>Places</h1>",
+                      self.client.get("/hbnb_filters").data)
+        response = self.client.post("/places_search", json={})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("places", response.get_json())
+
+    def test_module_app(self):
+        """ A module still serves its routes on its own """
+        client = import_module("web_flask.7-states_list").app.test_client()
+        self.assertEqual(client.get("/states_list").status_code, 200)
+
+    def test_warm_freeze(self):
+        """ The objects are frozen when HBNB_GC_FREEZE=1 """
+        with mock.patch("gc.freeze") as freeze:
+            with mock.patch.dict("os.environ", {"HBNB_GC_FREEZE": "1"}):
+                warm()
+            freeze.assert_called_once_with()
+            warm()
+            freeze.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+""" Module for testing the ASGI server of the web_flask applications"""
+import asyncio
+import json
+import unittest
+from flask import Flask, request
+from web_flask.asgi import asgi
+
+
+class test_asgi(unittest.TestCase):
+    """ Class to test the asgi function """
+
+    def setUp(self):
+        """ Create an ASGI application of a Flask one """
+        app = Flask(__name__)
+
+        @app.route("/echo", methods=["GET", "POST"])
+        def echo():
+            """ Return what the request holds """
+            return {"method": request.method, "args": request.args,
+                    "body": request.get_data(as_text=True),
+                    "agent": request.headers.get("User-Agent"),
+                    "path": request.path, "root": request.script_root}
+
+        self.closed = []
+        app.teardown_appcontext(self.closed.append)
+        self.app = asgi(app, threads=2, max_body=8)
+
+    def call(self, scope, messages):
+        """ Send the messages to the application and return what it
+        sends back """
+        sent = []
+        messages = list(messages)
+
+        async def receive():
+            """ Return the next message """
+            return messages.pop(0)
+
+        async def send(message):
+            """ Keep a message """
+            sent.append(message)
+
+        asyncio.run(self.app(scope, receive, send))
+        return sent
+
+    def test_http(self):
+        """ A request is served by the WSGI application """
+        scope = {"type": "http", "method": "POST", "path": "/echo",
+                 "query_string": b"a=1", "http_version": "1.1", "headers": [
+                     (b"user-agent", b"test"), (b"content-length", b"4")]}
+        start, *body = self.call(scope, [
+            {"type": "http.request", "body": b"ab", "more_body": True},
+            {"type": "http.request", "body": b"cd"}])
+        self.assertEqual(start["status"], 200)
+        self.assertIn((b"content-type", b"application/json"),
+                      start["headers"])
+        body = b"".join(part["body"] for part in body)
+        self.assertEqual(json.loads(body), {
+            "method": "POST", "args": {"a": "1"}, "body": "abcd",
+            "agent": "test", "path": "/echo", "root": ""})
+        self.assertEqual(len(self.closed), 1)
+
+    def test_root_path(self):
+        """ The root path of the server is taken out of the path """
+        scope = {"type": "http", "method": "GET", "path": "/hbnb/echo",
+                 "root_path": "/hbnb", "query_string": b"",
+                 "http_version": "1.1"}
+        start, *body = self.call(scope, [{"type": "http.request"}])
+        self.assertEqual(start["status"], 200)
+        found = json.loads(b"".join(part["body"] for part in body))
+        self.assertEqual((found["path"], found["root"]), ("/echo", "/hbnb"))
+
+    def test_too_large(self):
+        """ A body over the maximum is refused before the application
+        runs, whether its length is given or not """
+        scope = {"type": "http", "method": "POST", "path": "/echo",
+                 "query_string": b"", "http_version": "1.1",
+                 "headers": [(b"content-length", b"9")]}
+        start = self.call(scope, [])[0]
+        self.assertEqual(start["status"], 413)
+        del scope["headers"]
+        start = self.call(scope, [
+            {"type": "http.request", "body": b"abcd", "more_body": True},
+            {"type": "http.request", "body": b"efghi"}])[0]
+        self.assertEqual(start["status"], 413)
+        self.assertEqual(self.closed, [])
+
+    def test_not_found(self):
+        """ The status of the WSGI application is sent """
+        scope = {"type": "http", "method": "GET", "path": "/nope",
+                 "query_string": b"", "http_version": "1.1"}
+        start = self.call(scope, [{"type": "http.request"}])[0]
+        self.assertEqual(start["status"], 404)
+
+    def test_lifespan(self):
+        """ Startup and shutdown are acknowledged """
+        sent = self.call({"type": "lifespan"}, [
+            {"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+        self.assertEqual([message["type"] for message in sent],
+                         ["lifespan.startup.complete",
+                          "lifespan.shutdown.complete"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+""" Module for testing the page cache"""
+import time
+import unittest
+from flask import Flask
+from models import storage
+from models.state import State
+from web_flask.cache import PageCache, cache, cached
+
+
+class test_PageCache(unittest.TestCase):
+    """ Class to test the PageCache class """
+
+    def test_get(self):
+        """ A page is served while its generations are the same """
+        pages = PageCache()
+        etag = pages.put("/", (1,), b"page")
+        self.assertEqual(pages.get("/", (1,)), (b"page", etag))
+        self.assertIsNone(pages.get("/", (2,)))
+        self.assertIsNone(pages.get("/", (1,)))
+
+    def test_lru(self):
+        """ The least recently used pages are evicted first """
+        pages = PageCache(size=2)
+        pages.put("a", (), b"a")
+        pages.put("b", (), b"b")
+        pages.get("a", ())
+        pages.put("c", (), b"c")
+        self.assertIsNone(pages.get("b", ()))
+        self.assertIsNotNone(pages.get("a", ()))
+        self.assertEqual(len(pages), 2)
+
+    def test_max_bytes(self):
+        """ The total size of the pages stays under the cap """
+        pages = PageCache(max_bytes=10)
+        pages.put("a", (), b"12345")
+        pages.put("b", (), b"123456")
+        pages.put("c", (), b"12345678901")
+        self.assertIsNone(pages.get("a", ()))
+        self.assertIsNotNone(pages.get("b", ()))
+        self.assertIsNone(pages.get("c", ()))
+
+    def test_ttl(self):
+        """ A page older than the TTL is not served """
+        pages = PageCache(ttl=0.01)
+        pages.put("a", (), b"a")
+        time.sleep(0.02)
+        self.assertIsNone(pages.get("a", ()))
+
+
+class test_cached(unittest.TestCase):
+    """ Class to test the cached decorator """
+
+    def setUp(self):
+        """ Create an app with a cached view counting its renders """
+        self.renders = 0
+        app = Flask(__name__)
+
+        @app.route("/states")
+        @cached(State)
+        def states():
+            """ Render the number of states """
+            self.renders += 1
+            return str(len(storage.all(State)))
+
+        self.client = app.test_client()
+        cache.clear()
+
+    def tearDown(self):
+        """ Empty the cache """
+        cache.clear()
+
+    def test_hit(self):
+        """ A page is rendered once and then sent with its ETag """
+        first = self.client.get("/states")
+        second = self.client.get("/states")
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.headers["ETag"], second.headers["ETag"])
+
+    def test_not_modified(self):
+        """ A request holding the ETag of the page gets a 304 """
+        etag = self.client.get("/states").headers["ETag"]
+        response = self.client.get("/states",
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b"")
+
+    def test_invalidation(self):
+        """ Saving an object of the class renders the page again """
+        self.client.get("/states")
+        state = State(name="California")
+        storage.new(state)
+        storage.save()
+        self.client.get("/states")
+        self.assertEqual(self.renders, 2)
+        storage.delete(state)
+        storage.save()
+
+
+if __name__ == '__main__':
+    unittest.main()
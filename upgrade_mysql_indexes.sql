@@ -0,0 +1,13 @@
+-- add the indexes of the models to a database created before them
+-- (new databases get them from DBStorage.reload)
+-- run once: mysql -u root -p hbnb_dev_db < upgrade_mysql_indexes.sql
+-- InnoDB already indexes every foreign key column (places.user_id,
+-- reviews.place_id, reviews.user_id, place_amenity.amenity_id...), so
+-- only the indexes serving the sorted pages are added
+-- cities of a state, sorted by name
+CREATE INDEX ix_cities_state_id_name ON cities (state_id, name);
+-- places of a city, sorted by name
+CREATE INDEX ix_places_city_id_name ON places (city_id, name);
+-- states and amenities sorted by name
+CREATE INDEX ix_states_name ON states (name);
+CREATE INDEX ix_amenities_name ON amenities (name);
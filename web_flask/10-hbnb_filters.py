@@ -4,18 +4,21 @@
 
 from models import storage
 from models.state import State
+from models.city import City
 from models.amenity import Amenity
 from flask import Flask, render_template
+from web_flask.cache import cached
 
 app = Flask(__name__)
 
 
 @app.route("/hbnb_filters")
+@cached(State, City, Amenity)
 def hbnb_filters():
     """Render template with states"""
     path = "10-hbnb_filters.html"
-    states = storage.all(State)
-    amenities = storage.all(Amenity)
+    states = storage.all(State, load=["cities"], order_by="name")
+    amenities = storage.all(Amenity, order_by="name")
     return render_template(path, states=states, amenities=amenities)
 
 
@@ -4,21 +4,68 @@
 
 from models import storage
 from models.state import State
+from models.city import City
 from models.amenity import Amenity
 from models.place import Place
-from flask import Flask, render_template
+from models.user import User
+from flask import Blueprint, Flask, render_template, jsonify, request
+from web_flask.cache import cached
+from web_flask.pagination import paginate, page_args
 
+blueprint = Blueprint("hbnb", __name__)
 app = Flask(__name__)
 
 
-@app.route("/hbnb_filters")
+@blueprint.route("/hbnb_filters")
+@cached(State, City, Amenity, Place, User)
 def hbnb_filters():
-    """Render template with states"""
+    """Render template with the states and amenities to filter on and
+    a page of places, all sorted by name"""
     path = "100-hbnb.html"
-    states = storage.all(State)
-    amenities = storage.all(Amenity)
-    places = storage.all(Place)
-    return render_template(path, states=states, amenities=amenities, places=places)
+    states = storage.all(State, load=["cities"], order_by="name")
+    amenities = storage.all(Amenity, order_by="name")
+    page = paginate(Place, load=["user"])
+    return render_template(path, states=states, amenities=amenities,
+                           places=page.items, page=page)
+
+
+@blueprint.route("/places_search", methods=["POST"])
+def places_search():
+    """Return a page of the places matching the filters of the JSON
+    body, sorted by name: {"states": [ids], "cities": [ids],
+    "amenities": [ids]}, all optional
+    A place matches when its city is one of the cities or of the
+    cities of the states, if any are given, and it has every amenity.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "Not a JSON"}), 400
+    for name in ("states", "cities", "amenities"):
+        ids = body.get(name, [])
+        if (not isinstance(ids, list) or
+                not all(isinstance(value, str) for value in ids)):
+            return jsonify({"error": name + " is not a list of ids"}), 400
+    states = body.get("states", [])
+    cities = set(body.get("cities", []))
+    if states:
+        cities.update(row[0] for row in storage.query(City).filter(
+            state_id__in=states).values("id"))
+    query = storage.query(Place)
+    if states or cities:
+        query = query.filter(city_id__in=sorted(cities))
+    for amenity in body.get("amenities", []):
+        query = query.filter(amenities__has=amenity)
+    number, per_page = page_args()
+    # one more place tells whether there is a next page
+    places = query.order_by("name").offset((number - 1) * per_page).limit(
+        per_page + 1).all()
+    return jsonify({"page": number, "per_page": per_page,
+                    "has_next": len(places) > per_page,
+                    "places": [place.to_dict()
+                               for place in places[:per_page]]})
+
+
+app.register_blueprint(blueprint)
 
 
 @app.teardown_appcontext
@@ -4,19 +4,24 @@
 
 from models import storage
 from models.state import State
-from flask import Flask, render_template
+from flask import Blueprint, Flask, render_template
+from web_flask.cache import cached
+from web_flask.pagination import paginate
 
+blueprint = Blueprint("states_list", __name__)
 app = Flask(__name__)
 
 
-@app.route("/states_list")
+@blueprint.route("/states_list")
+@cached(State)
 def states_list():
-    """Render template with states"""
+    """Render template with a page of states sorted by name"""
     path = "7-states_list.html"
-    states = storage.all(State)
-    # sort State object alphabetically by name
-    sorted_states = sorted(states.values(), key=lambda state: state.name)
-    return render_template(path, sorted_states=sorted_states)
+    page = paginate(State)
+    return render_template(path, sorted_states=page.items, page=page)
+
+
+app.register_blueprint(blueprint)
 
 
 @app.teardown_appcontext
@@ -4,20 +4,25 @@
 
 from models import storage
 from models.state import State
-from flask import Flask, render_template
+from models.city import City
+from flask import Blueprint, Flask, render_template
+from web_flask.cache import cached
+from web_flask.pagination import paginate
 
+blueprint = Blueprint("cities_by_states", __name__)
 app = Flask(__name__)
 
 
-@app.route("/cities_by_states")
+@blueprint.route("/cities_by_states")
+@cached(State, City)
 def states_list():
-    """Render template with states"""
+    """Render template with a page of states sorted by name"""
     path = "8-cities_by_states.html"
-    states = storage.all(State)
+    page = paginate(State, load=["cities"])
+    return render_template(path, states=page.items, page=page)
 
-    # sort State object alphabetically by name
-    # sorted_states = sorted(states.values(), key=lambda state: state.name)
-    return render_template(path, states=states)
+
+app.register_blueprint(blueprint)
 
 
 @app.teardown_appcontext
@@ -4,18 +4,30 @@
 
 from models import storage
 from models.state import State
-from flask import Flask, render_template
+from models.city import City
+from flask import Blueprint, Flask, render_template
+from web_flask.cache import cached
+from web_flask.pagination import paginate
 
+blueprint = Blueprint("states", __name__)
 app = Flask(__name__)
 
 
-@app.route("/states")
-@app.route("/states/<id>")
+@blueprint.route("/states")
+@blueprint.route("/states/<id>")
+@cached(State, City)
 def states_list(id=None):
-    """Render template with states"""
+    """Render template with a page of states sorted by name, or with
+    the state of the given id"""
     path = "9-states.html"
-    states = storage.all(State)
-    return render_template(path, states=states, id=id)
+    if id is None:
+        page = paginate(State)
+        return render_template(path, states=page.items, page=page, id=id)
+    state = storage.get(State, id)
+    return render_template(path, state=state, id=id)
+
+
+app.register_blueprint(blueprint)
 
 
 @app.teardown_appcontext
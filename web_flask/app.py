@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Application serving every route of web_flask
+
+    from web_flask.app import create_app
+    app = create_app()
+
+The numbered modules each build an application of their own, from one
+blueprint. create_app registers the blueprints of the modules which
+hold the latest version of each route: 6-number_odd_or_even has the
+routes of 0 to 5, and the /hbnb_filters of 100-hbnb replaces the one
+of 10-hbnb_filters.
+
+The storage is shared by every route and warmed before the
+application is returned, so a server loading it before forking its
+workers (see web_flask/wsgi.py) hands them the loaded objects and
+indexes instead of having each worker build them. With
+HBNB_GC_FREEZE=1 they are then frozen (see gc.freeze): the garbage
+collections of the workers skip them instead of writing to each one,
+which would copy the pages a worker shares with the master.
+"""
+import gc
+from importlib import import_module
+from os import getenv
+from flask import Flask
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.state import State
+
+MODULES = ("6-number_odd_or_even", "7-states_list", "8-cities_by_states",
+           "9-states", "100-hbnb")
+
+
+def create_app(modules=MODULES):
+    """Return an application with the blueprints of web_flask modules
+    Args:
+        modules: names of the web_flask modules, later ones can't
+            serve a path an earlier one serves
+    """
+    app = Flask(__name__)
+    app.url_map.strict_slashes = False
+    for name in modules:
+        app.register_blueprint(
+            import_module("web_flask." + name).blueprint)
+
+    @app.teardown_appcontext
+    def app_teardown(arg=None):
+        """Clean-up session"""
+        storage.close()
+
+    warm()
+    return app
+
+
+def warm():
+    """Build what the first requests would: the sorted indexes of the
+    listing routes in FileStorage, and the connection of DBStorage,
+    given back before returning, then freeze the objects if
+    HBNB_GC_FREEZE=1"""
+    for cls in (State, City, Amenity, Place):
+        storage.all(cls, order_by="name", limit=1)
+    storage.close()
+    if getenv("HBNB_GC_FREEZE") == "1":
+        gc.freeze()
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+"""ASGI server of the web_flask applications
+
+    pip install uvicorn a2wsgi
+    HBNB_WEB_APP=100-hbnb uvicorn web_flask.asgi:app
+
+The event loop of the ASGI server holds the connections, and each
+request runs its Flask application in a thread of the WSGI bridge
+(a2wsgi), so there are never more requests using the storage than
+HBNB_ASYNC_THREADS: the others wait for a thread on the loop instead
+of each taking a thread and waiting for a connection of the pool. The
+default is 16 threads for DBStorage, as many as its connection pool
+can serve (HBNB_DB_POOL_SIZE plus HBNB_DB_MAX_OVERFLOW), and 1 for
+FileStorage, whose work holds the GIL. The storage is closed by the
+teardown of the Flask application, once per request.
+
+Request bodies are read on the loop up to HBNB_ASGI_MAX_BODY bytes
+(1 MiB by default); a larger one is answered with 413 before the
+application runs. HBNB_WEB_APP names the web_flask module served:
+100-hbnb by default, or wsgi for every route (see web_flask/app.py).
+"""
+from importlib import import_module
+from os import getenv
+from a2wsgi import WSGIMiddleware
+
+
+def asgi(wsgi_app, threads=None, max_body=None):
+    """Return an ASGI application serving a WSGI one
+    Args:
+        wsgi_app: WSGI application, e.g. the app of a web_flask module
+        threads: number of threads running the requests, from the
+            environment by default
+        max_body: largest request body accepted, in bytes, from the
+            environment by default
+    """
+    if threads is None:
+        threads = int(getenv("HBNB_ASYNC_THREADS", 0))
+    if not threads:
+        threads = 16 if getenv("HBNB_TYPE_STORAGE") == "db" else 1
+    if max_body is None:
+        max_body = int(getenv("HBNB_ASGI_MAX_BODY", 1 << 20))
+    bridge = WSGIMiddleware(wsgi_app, workers=threads)
+
+    async def application(scope, receive, send):
+        """serves one connection scope"""
+        if scope["type"] != "http":
+            return await bridge(scope, receive, send)
+        for name, value in scope.get("headers", []):
+            if (name == b"content-length" and value.isdigit() and
+                    int(value) > max_body):
+                return await too_large(send)
+        body = []
+        size = 0
+        while True:
+            message = await receive()
+            body.append(message.get("body", b""))
+            size += len(body[-1])
+            if size > max_body:
+                return await too_large(send)
+            if not message.get("more_body"):
+                break
+        messages = [{"type": "http.request", "body": b"".join(body)}]
+
+        async def replay():
+            """returns the body read, then waits for the disconnection"""
+            if messages:
+                return messages.pop()
+            return await receive()
+        await bridge(scope, replay, send)
+    return application
+
+
+async def too_large(send):
+    """Send a 413 response
+    Args:
+        send: ASGI send callable of the request
+    """
+    body = b"Request body too large"
+    await send({"type": "http.response.start", "status": 413,
+                "headers": [(b"content-type", b"text/plain"),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+app = asgi(import_module(
+    "web_flask." + getenv("HBNB_WEB_APP", "100-hbnb")).app)
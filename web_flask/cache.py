@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""Cache of the rendered pages
+
+A page is kept with the generations of the classes it was rendered
+from (see storage.generations) and served again until one of them
+changes, it is older than HBNB_PAGE_CACHE_TTL seconds (60 by default,
+0 for no limit), or it is evicted as the least recently used page once
+the cache holds more than HBNB_PAGE_CACHE_SIZE pages (256) or
+HBNB_PAGE_CACHE_BYTES bytes (16 MiB). HBNB_PAGE_CACHE_SIZE=0 turns the
+cache off.
+
+Pages are sent with an ETag, and a request whose If-None-Match holds
+it gets a 304 without the page. The TTL bounds how long a page can
+lag behind the writes of other processes, which DBStorage does not see.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from os import getenv
+from flask import current_app, request
+from models import storage
+
+
+class PageCache:
+    """Least recently used pages, by key
+    Attributes:
+        __size: maximum number of pages
+        __max_bytes: maximum total size of the pages
+        __ttl: seconds a page is served, or 0 for no limit
+        __pages: (generations, expiry, body, etag) of the pages, by
+            key, the least recently used first
+        __bytes: total size of the pages
+    """
+
+    def __init__(self, size=256, max_bytes=16 << 20, ttl=60):
+        """creates an empty cache
+        Args:
+            size: maximum number of pages
+            max_bytes: maximum total size of the pages
+            ttl: seconds a page is served, or 0 for no limit
+        """
+        self.__size = size
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__pages = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+
+    def get(self, key, generations):
+        """returns the body and ETag of a page, or None when the page
+        is missing, expired or rendered from other generations
+        Args:
+            key: key of the page
+            generations: current generations of its classes
+        """
+        with self.__lock:
+            page = self.__pages.get(key)
+            if page is None:
+                return None
+            if page[0] != generations or (
+                    page[1] and page[1] < time.monotonic()):
+                self.__drop(key)
+                return None
+            self.__pages.move_to_end(key)
+            return page[2], page[3]
+
+    def put(self, key, generations, body):
+        """keeps a page, evicting the least recently used ones past the
+        size limits
+        Args:
+            key: key of the page
+            generations: generations of its classes before it was
+                rendered
+            body: bytes of the page
+        Return:
+            returns the ETag of the page
+        """
+        etag = hashlib.sha1(body).hexdigest()
+        if not self.__size or len(body) > self.__max_bytes:
+            return etag
+        expiry = time.monotonic() + self.__ttl if self.__ttl else 0
+        with self.__lock:
+            if key in self.__pages:
+                self.__drop(key)
+            self.__pages[key] = (generations, expiry, body, etag)
+            self.__bytes += len(body)
+            while (len(self.__pages) > self.__size or
+                   self.__bytes > self.__max_bytes):
+                self.__drop(next(iter(self.__pages)))
+        return etag
+
+    def clear(self):
+        """drops every page"""
+        with self.__lock:
+            self.__pages.clear()
+            self.__bytes = 0
+
+    def __len__(self):
+        """returns the number of pages"""
+        return len(self.__pages)
+
+    def __drop(self, key):
+        """removes a page, the lock being held
+        Args:
+            key: key of the page
+        """
+        self.__bytes -= len(self.__pages.pop(key)[2])
+
+
+cache = PageCache(int(getenv("HBNB_PAGE_CACHE_SIZE", 256)),
+                  int(getenv("HBNB_PAGE_CACHE_BYTES", 16 << 20)),
+                  float(getenv("HBNB_PAGE_CACHE_TTL", 60)))
+
+
+def cached(*classes):
+    """Decorate a view rendering a page from the objects of classes
+    to serve it from the cache, keyed by the path and query string
+    Args:
+        classes: classes of the objects the page shows
+    """
+    def decorator(view):
+        """wraps view"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            """serves the page from the cache or renders it"""
+            key = view.__module__, view.__name__, request.full_path
+            generations = storage.generations(*classes)
+            page = cache.get(key, generations)
+            if page is None:
+                body = view(*args, **kwargs)
+                if not isinstance(body, str):
+                    return body
+                body = body.encode()
+                page = body, cache.put(key, generations, body)
+            response = current_app.response_class(page[0],
+                                                  mimetype="text/html")
+            response.set_etag(page[1])
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
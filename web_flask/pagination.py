@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+"""Pagination of the listing routes
+
+A page is read from the storage sorted and cut to size, so a route
+only loads the objects it renders. The page number and size come from
+the ?page= and ?per_page= parameters of the request.
+"""
+from collections import namedtuple
+from flask import request
+from models import storage
+
+PER_PAGE = 100
+MAX_PER_PAGE = 1000
+
+Page = namedtuple("Page", ["items", "number", "per_page", "has_next"])
+
+
+def page_args():
+    """Return the page number and size the request asks for, within
+    bounds
+    """
+    number = max(request.args.get("page", 1, type=int), 1)
+    per_page = request.args.get("per_page", PER_PAGE, type=int)
+    return number, min(max(per_page, 1), MAX_PER_PAGE)
+
+
+def paginate(cls, order_by="name", load=None):
+    """Return the page of objects of cls the request asks for
+    Args:
+        cls: class of the objects
+        order_by: attribute to sort them on (see storage.all)
+        load: relationships to fetch with them (see storage.all)
+    Return:
+        returns a Page of the objects in order, with its number and
+        size and whether a next page exists
+    """
+    number, per_page = page_args()
+    # one more object tells whether there is a next page
+    objs = storage.all(cls, load=load, order_by=order_by,
+                       limit=per_page + 1, offset=(number - 1) * per_page)
+    items = list(objs.values())
+    return Page(items[:per_page], number, per_page, len(items) > per_page)
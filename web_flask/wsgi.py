@@ -0,0 +1,18 @@
+#!/usr/bin/python3
+"""WSGI entry point of the web_flask application
+
+    gunicorn                  (settings of gunicorn.conf.py)
+    uwsgi --http :5000 --master --processes 4 --module web_flask.wsgi:app
+
+Both load the application, and so the storage, in the master process
+before forking the workers (gunicorn's preload_app, uwsgi without
+--lazy-apps): the workers share the loaded objects copy-on-write
+instead of reloading them each; set HBNB_GC_FREEZE=1 to keep the
+garbage collector from copying them (see web_flask/app.py). The
+storage is made safe to fork: DBStorage drops the connections of the
+master in each worker, and the background writer of FileStorage is
+restarted there.
+"""
+from web_flask.app import create_app
+
+app = create_app()